@@ -1,20 +1,87 @@
+import asyncio
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi_pagination import add_pagination
+from prometheus_client import CONTENT_TYPE_LATEST
 
-from app.core.models import db_helper, Base
+from app.core.models import db_helper, init_schema
 from app.api import router as router_v1
 from app.core.config import config
+from app.core.metrics import (
+    REQUESTS_IN_PROGRESS,
+    RequestContext,
+    request_context,
+    observe_request,
+    instrument_engine,
+    render_metrics,
+)
+from app.core.slow_queries import configure_slow_query_log, log_slow_queries
+from app.api.auth.helpers import password_executor, run_refresh_token_purge
+from app.api.auth.denylist import token_denylist
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with db_helper.engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if config.db_init_schema_on_startup:
+        await init_schema(db_helper.engine)
+    await token_denylist.refresh(db_helper.session_factory)
+    denylist_refresh = asyncio.create_task(
+        token_denylist.run(db_helper.session_factory, config.TOKEN_DENYLIST_REFRESH_SECONDS)
+    )
+    refresh_token_purge = asyncio.create_task(
+        run_refresh_token_purge(
+            db_helper.session_factory, config.REFRESH_TOKEN_PURGE_SECONDS, config.REFRESH_TOKEN_PURGE_BATCH_SIZE
+        )
+    )
 
     yield
 
+    denylist_refresh.cancel()
+    refresh_token_purge.cancel()
+    password_executor.shutdown(wait=False)
+
 app = FastAPI(lifespan=lifespan)
 
+if config.db_slow_query_seconds is not None:
+    configure_slow_query_log(config.db_slow_query_log)
+
+for engine in (db_helper.engine, *db_helper.replica_engines):
+    instrument_engine(engine)
+    if config.db_slow_query_seconds is not None:
+        log_slow_queries(engine, config.db_slow_query_seconds, config.db_slow_query_explain_rate)
+
+
+@app.middleware("http")
+async def stick_writers_to_primary(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        db_helper.mark_writer(db_helper.client_key(request.headers.get("Authorization")))
+    return response
+
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    context = RequestContext(request.scope)
+    token = request_context.set(context)
+    in_progress = REQUESTS_IN_PROGRESS.labels(request.method)
+    in_progress.inc()
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        in_progress.dec()
+        observe_request(request.method, context, status_code, time.perf_counter() - started)
+        request_context.reset(token)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
 app.include_router(router=router_v1, prefix=config.api_v1_prefix)
 add_pagination(app)
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.models import TokenRevocation
+
+logger = logging.getLogger(__name__)
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def timestamp(moment: datetime) -> float:
+    return moment.replace(tzinfo=timezone.utc).timestamp()
+
+
+class TokenDenylist:
+    """
+    Token Denylist Class
+    ---
+    description: In-memory copy of the token_revocations table, checked on every request so that
+        access tokens can be revoked without looking anything up in the database.
+        Every worker process refreshes its copy in the background; revocations made by
+        the process itself apply at once, those of other workers after the next refresh.
+    """
+    def __init__(self):
+        self.jtis: set[str] = set()
+        self.users: dict[str, float] = {}
+        self.refreshed_at: datetime | None = None
+        self._added_during_refresh: list[TokenRevocation] | None = None
+
+    def is_revoked(self, payload: dict) -> bool:
+        """
+        Is Revoked
+        ---
+        description: Checks the claims of a decoded access token against the denylist.
+            Tokens without iat are treated as issued at the epoch.
+        responses:
+            200:
+                description: Returns True if the token was revoked by jti or by user.
+        """
+        if payload.get("jti") in self.jtis:
+            return True
+        revoked_at = self.users.get(payload.get("sub"))
+        return revoked_at is not None and payload.get("iat", 0) < revoked_at
+
+    def add(self, revocations: Iterable[TokenRevocation]) -> None:
+        """
+        Add
+        ---
+        description: Applies revocations to the local copy without waiting for the next refresh.
+            Revocations added while a refresh is running are also applied to its result, as the
+            refresh may have read the table before they were committed.
+        """
+        revocations = list(revocations)
+        if self._added_during_refresh is not None:
+            self._added_during_refresh.extend(revocations)
+        for revocation in revocations:
+            if revocation.jti is not None:
+                self.jtis.add(revocation.jti)
+            if revocation.username is not None:
+                revoked_at = timestamp(revocation.revoked_at)
+                self.users[revocation.username] = max(self.users.get(revocation.username, 0), revoked_at)
+
+    async def refresh(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        """
+        Refresh
+        ---
+        description: Drops expired revocations from the table and reloads the remaining ones.
+        parameters:
+            - name: session_factory
+              in: body
+              description: Factory of a session on the primary
+              required: true
+              schema:
+                type: object
+        """
+        now = utcnow()
+        added = self._added_during_refresh = []
+        try:
+            async with session_factory() as session:
+                await session.execute(delete(TokenRevocation).where(TokenRevocation.expires_at <= now))
+                revocations = list(await session.scalars(select(TokenRevocation)))
+                await session.commit()
+        finally:
+            self._added_during_refresh = None
+        fresh = TokenDenylist()
+        fresh.add(revocations)
+        fresh.add(added)
+        self.jtis, self.users, self.refreshed_at = fresh.jtis, fresh.users, now
+
+    async def run(self, session_factory: async_sessionmaker[AsyncSession], interval: float) -> None:
+        """
+        Run
+        ---
+        description: Refreshes the denylist every interval seconds until cancelled. A failed refresh
+            keeps the previous copy and is retried on the next tick.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh(session_factory)
+            except Exception:
+                logger.exception("Token denylist refresh failed")
+
+
+def user_revocation(username: str, token_lifetime: timedelta) -> TokenRevocation:
+    """
+    User Revocation
+    ---
+    description: Builds the revocation of every token of a user issued until now.
+    parameters:
+        - name: username
+          in: body
+          description: Subject of the revoked tokens
+          required: true
+          schema:
+            type: string
+        - name: token_lifetime
+          in: body
+          description: Lifetime of access tokens, after which the entry can be dropped
+          required: true
+          schema:
+            type: string
+    responses:
+        200:
+            description: Returns the TokenRevocation, not yet added to a session.
+    """
+    now = utcnow()
+    return TokenRevocation(username=username, revoked_at=now, expires_at=now + token_lifetime)
+
+
+token_denylist = TokenDenylist()
@@ -1,27 +1,119 @@
+import asyncio
+import hashlib
+import logging
+import secrets
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
 from jose import JWTError, jwt
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import select, update, delete, event, inspect, insert
 from fastapi import HTTPException, Depends
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 
-from app.core.models import db_helper, User
-from .schemas import UserCreate, TokenData
+from app.core.models import db_helper, User, TokenRevocation, RefreshToken
+from app.core.models.user import Permission
+from .schemas import UserCreate, TokenData, TokenUser
+from .denylist import token_denylist, user_revocation
+from .rate_limit import password_admission
 from app import exceptions
 from app.core.config import config
+from app.core.cache import TTLCache
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+
+def password_context(
+        scheme: str,
+        rounds: int | None = None,
+        deprecated_schemes: list[str] | None = None,
+) -> CryptContext:
+    """
+    Password Context
+    ---
+    description: Builds the passlib context that hashes new passwords with the given scheme and cost.
+        Hashes of deprecated_schemes still verify, but they and hashes of the scheme with
+        other rounds than the configured ones are reported by needs_update.
+    parameters:
+        - name: scheme
+          in: body
+          description: passlib scheme of new hashes, e.g. bcrypt or argon2
+          required: true
+          schema:
+            type: string
+        - name: rounds
+          in: body
+          description: Cost of the scheme (log2 rounds for bcrypt), the passlib default if omitted
+          required: false
+          schema:
+            type: integer
+        - name: deprecated_schemes
+          in: body
+          description: Schemes of existing hashes that are replaced on the next login
+          required: false
+          schema:
+            type: array
+    responses:
+        200:
+            description: Returns the CryptContext.
+    """
+    settings = {f"{scheme}__rounds": rounds} if rounds is not None else {}
+    return CryptContext(schemes=[scheme, *(deprecated_schemes or [])], deprecated="auto", **settings)
+
+
+pwd_context = password_context(
+    scheme=config.PASSWORD_HASH_SCHEME,
+    rounds=config.PASSWORD_HASH_ROUNDS,
+    deprecated_schemes=config.PASSWORD_HASH_DEPRECATED_SCHEMES,
+)
+
+password_executor = ThreadPoolExecutor(
+    max_workers=config.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+password_slots = asyncio.Semaphore(config.PASSWORD_HASH_WORKERS)
+_rehash_tasks: set[asyncio.Task] = set()
+
+user_cache = TTLCache(maxsize=config.USER_CACHE_SIZE, ttl=config.USER_CACHE_TTL_SECONDS)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 
 
+async def get_token_payload(token: Annotated[str, Depends(oauth2_scheme)]) -> dict:
+    """
+    Get Token Payload
+    ---
+    description: Decodes the bearer token and checks it against the in-memory token denylist.
+    parameters:
+        - name: token
+          in: header
+          description: JWT token for authentication
+          required: true
+          schema:
+            type: string
+    responses:
+        200:
+            description: Returns the claims of the token.
+        401:
+            description: Token is invalid, expired, has no subject or was revoked.
+    """
+    try:
+        payload = jwt.decode(token, config.SECRET_KEY, algorithms=[config.ALGORITHM])
+    except JWTError:
+        raise exceptions.Unauthorized()
+    if payload.get("sub") is None or token_denylist.is_revoked(payload):
+        raise exceptions.Unauthorized()
+    return payload
+
+
 async def get_current_user(
-        token: Annotated[str, Depends(oauth2_scheme)],
-        session: AsyncSession = Depends(db_helper.scoped_session_dependency),
-):
+        payload: Annotated[dict, Depends(get_token_payload)],
+        session: AsyncSession = Depends(db_helper.session_dependency),
+) -> TokenUser:
     """
     Get Current User
     ---
@@ -40,26 +132,123 @@ async def get_current_user(
             description: Unauthorized access. Invalid or missing token.
         404:
             description: User not found.
+    notes: The user is returned as a TokenUser snapshot, never as an ORM instance. With
+        STATELESS_AUTH it is built from the permission claim of the token and the database is
+        not queried at all; revocations are enforced by token_denylist. Otherwise resolved
+        users are kept in user_cache keyed by the token subject, so repeated requests with the
+        same token skip the database lookup until the entry expires.
     """
-    try:
-        payload = jwt.decode(token, config.SECRET_KEY, algorithms=[config.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise exceptions.Unauthorized()
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise exceptions.Unauthorized()
-    stmt = select(User).where(User.username == token_data.username)
+    token_data = TokenData(username=payload["sub"])
+    if config.STATELESS_AUTH and "perm" in payload:
+        return TokenUser(username=token_data.username, permission=Permission(payload["perm"]))
+    user = user_cache.get(token_data.username)
+    if user is not None:
+        return user
+    stmt = select(User.username, User.permission).where(User.username == token_data.username)
     res = await session.execute(stmt)
-    user = res.scalars().first()
-    if not user:
+    row = res.first()
+    if not row:
         raise exceptions.ContentNotFound("User not exists!")
+    user = TokenUser(username=row.username, permission=row.permission)
+    user_cache.set(token_data.username, user)
     return user
 
 
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_cached_user(mapper, connection, target: User):
+    """
+    Invalidate Cached User
+    ---
+    description: Drops a user from user_cache whenever the ORM flushes a change or deletion of it.
+        Bulk UPDATE/DELETE statements bypass ORM events and must call user_cache.delete themselves.
+    """
+    user_cache.delete(target.username)
+    for old_username in inspect(target).attrs.username.history.deleted:
+        user_cache.delete(old_username)
+
+
+@event.listens_for(User, "after_update")
+def revoke_tokens_of_updated_user(mapper, connection, target: User):
+    """
+    Revoke Tokens of Updated User
+    ---
+    description: Revokes the access tokens of a user whose permission or username changed, as
+        stateless tokens carry both. Applied to the local denylist at once, to other workers
+        on their next refresh.
+    """
+    state = inspect(target)
+    if not (state.attrs.permission.history.has_changes() or state.attrs.username.history.has_changes()):
+        return
+    _revoke_user_tokens(connection, [*state.attrs.username.history.deleted, target.username])
+
+
+@event.listens_for(User, "after_delete")
+def revoke_tokens_of_deleted_user(mapper, connection, target: User):
+    """
+    Revoke Tokens of Deleted User
+    ---
+    description: Revokes the access tokens of a deleted user.
+    """
+    _revoke_user_tokens(connection, [target.username])
+
+
+def _revoke_user_tokens(connection, usernames: list[str]) -> None:
+    lifetime = timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES)
+    revocations = [user_revocation(username, lifetime) for username in usernames]
+    connection.execute(
+        insert(TokenRevocation),
+        [
+            {
+                "username": revocation.username,
+                "revoked_at": revocation.revoked_at,
+                "expires_at": revocation.expires_at,
+            }
+            for revocation in revocations
+        ],
+    )
+    token_denylist.add(revocations)
+
+
+async def revoke_token(payload: dict, session: AsyncSession) -> None:
+    """
+    Revoke Token
+    ---
+    description: Adds one access token to the denylist by its jti until it expires.
+    parameters:
+        - name: payload
+          in: body
+          description: Claims of the token to revoke
+          required: true
+          schema:
+            type: object
+        - name: session
+          in: body
+          description: AsyncSession object for database access
+          required: true
+          schema:
+            type: object
+    responses:
+        200:
+            description: Token revoked.
+        400:
+            description: Token has no jti and can not be revoked on its own.
+    """
+    if "jti" not in payload:
+        raise exceptions.BadDataFormat(detail="Token can not be revoked!")
+    revocation = TokenRevocation(
+        jti=payload["jti"],
+        revoked_at=datetime.now(timezone.utc).replace(tzinfo=None),
+        expires_at=datetime.fromtimestamp(payload["exp"], timezone.utc).replace(tzinfo=None),
+    )
+    session.add(revocation)
+    await session.commit()
+    token_denylist.add([revocation])
+
+
 async def registrate_user(
         user_data: UserCreate,
-        session: AsyncSession = Depends(db_helper.scoped_session_dependency)
+        session: AsyncSession = Depends(db_helper.session_dependency)
 ):
     """
     Register User
@@ -81,7 +270,7 @@ async def registrate_user(
     user = await get_user(username=user_data.username, session=session)
     if user:
         raise exceptions.UserAlreadyExists()
-    hashed_password = pwd_context.hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
     user = User(
         username=user_data.username,
         hashed_password=hashed_password,
@@ -96,7 +285,7 @@ async def registrate_user(
 async def authenticate_user(
         username: str,
         password: str,
-        session: AsyncSession = Depends(db_helper.scoped_session_dependency)
+        session: AsyncSession = Depends(db_helper.session_dependency)
 ):
     """
     Authenticate User
@@ -124,15 +313,65 @@ async def authenticate_user(
     user = await get_user(username=username, session=session)
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
-    verification_result = verify_password(password, user.hashed_password)
+    verification_result = await verify_password(password, user.hashed_password)
     if not verification_result:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
+    if pwd_context.needs_update(user.hashed_password):
+        task = asyncio.get_running_loop().create_task(
+            rehash_password(username=user.username, password=password, hashed_password=user.hashed_password)
+        )
+        _rehash_tasks.add(task)
+        task.add_done_callback(_rehash_tasks.discard)
     return user
 
 
+async def rehash_password(username: str, password: str, hashed_password: str) -> None:
+    """
+    Rehash Password
+    ---
+    description: Replaces an outdated password hash with one of the configured scheme and cost.
+        Runs in the background after a successful login, so the login does not wait for the
+        second hash. The UPDATE only applies if the stored hash is still the outdated one,
+        and a failure leaves it in place for the next login to retry.
+    parameters:
+        - name: username
+          in: body
+          description: User that just logged in
+          required: true
+          schema:
+            type: string
+        - name: password
+          in: body
+          description: Verified plain password
+          required: true
+          schema:
+            type: string
+        - name: hashed_password
+          in: body
+          description: Outdated hash the password was verified against
+          required: true
+          schema:
+            type: string
+    """
+    try:
+        new_hash = await get_password_hash(password)
+        async with db_helper.session_factory() as session:
+            await session.execute(
+                update(User)
+                .where(User.username == username, User.hashed_password == hashed_password)
+                .values(hashed_password=new_hash)
+            )
+            await session.commit()
+        user_cache.delete(username)
+    except HTTPException:
+        pass
+    except Exception:
+        logger.exception("Rehashing the password of %s failed", username)
+
+
 async def get_user(
         username: str,
-        session: AsyncSession = Depends(db_helper.scoped_session_dependency)
+        session: AsyncSession = Depends(db_helper.session_dependency)
 ):
     """
     Get User
@@ -162,6 +401,7 @@ def create_access_token(
     Create Access Token
     ---
     description: Generate an access token with optional expiration time.
+        Every token gets a unique jti and an iat claim so that it can be revoked.
     parameters:
         - name: data
           in: body
@@ -183,12 +423,252 @@ def create_access_token(
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, config.SECRET_KEY, algorithm=config.ALGORITHM)
     return encoded_jwt
 
 
-def verify_password(
+def hash_refresh_token(refresh_token: str) -> str:
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+
+async def issue_refresh_token(
+        username: str,
+        session: AsyncSession,
+        family: str | None = None,
+) -> str:
+    """
+    Issue Refresh Token
+    ---
+    description: Creates a refresh token and stores its hash. The caller commits.
+    parameters:
+        - name: username
+          in: body
+          description: User the token is issued to
+          required: true
+          schema:
+            type: string
+        - name: session
+          in: body
+          description: AsyncSession object for database access
+          required: true
+          schema:
+            type: object
+        - name: family
+          in: body
+          description: Family of the rotated token, a new family if omitted
+          required: false
+          schema:
+            type: string
+    responses:
+        200:
+            description: Returns the refresh token, it is not stored anywhere in plain text.
+    """
+    refresh_token = secrets.token_urlsafe(32)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    session.add(RefreshToken(
+        token_hash=hash_refresh_token(refresh_token),
+        username=username,
+        family=family or uuid.uuid4().hex,
+        expires_at=now + timedelta(days=config.REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return refresh_token
+
+
+async def rotate_refresh_token(refresh_token: str, session: AsyncSession) -> tuple[User, str]:
+    """
+    Rotate Refresh Token
+    ---
+    description: Exchanges a refresh token for a new one of the same family.
+        Costs one lookup by the unique token hash instead of a password verification.
+        Marking the token as used is a conditional UPDATE, so of two concurrent refreshes
+        with the same token only one succeeds. A token presented after it was used is
+        treated as stolen and its family is deleted.
+    parameters:
+        - name: refresh_token
+          in: body
+          description: Refresh token returned by login or the previous refresh
+          required: true
+          schema:
+            type: string
+        - name: session
+          in: body
+          description: AsyncSession object for database access
+          required: true
+          schema:
+            type: object
+    responses:
+        200:
+            description: Returns the user and the new refresh token.
+        401:
+            description: Token is unknown, expired or was already used.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    stmt = (
+        select(RefreshToken, User)
+        .join(User, User.username == RefreshToken.username)
+        .where(RefreshToken.token_hash == hash_refresh_token(refresh_token))
+    )
+    row = (await session.execute(stmt)).first()
+    if row is None:
+        raise exceptions.Unauthorized()
+    stored, user = row
+    if stored.expires_at <= now:
+        raise exceptions.Unauthorized()
+
+    claimed = await session.scalar(
+        update(RefreshToken)
+        .where(RefreshToken.id == stored.id, RefreshToken.used_at.is_(None))
+        .values(used_at=now)
+        .returning(RefreshToken.id)
+    )
+    if claimed is None:
+        await session.execute(delete(RefreshToken).where(RefreshToken.family == stored.family))
+        await session.commit()
+        raise exceptions.Unauthorized()
+
+    new_refresh_token = await issue_refresh_token(username=user.username, session=session, family=stored.family)
+    await session.commit()
+    return user, new_refresh_token
+
+
+async def revoke_refresh_token_family(refresh_token: str, username: str, session: AsyncSession) -> None:
+    """
+    Revoke Refresh Token Family
+    ---
+    description: Deletes a refresh token and every token rotated from it, so none of them can
+        be refreshed any more. Tokens of other users and unknown tokens are ignored. The caller commits.
+    parameters:
+        - name: refresh_token
+          in: body
+          description: Refresh token returned by login or the last refresh
+          required: true
+          schema:
+            type: string
+        - name: username
+          in: body
+          description: User the token must belong to
+          required: true
+          schema:
+            type: string
+        - name: session
+          in: body
+          description: AsyncSession object for database access
+          required: true
+          schema:
+            type: object
+    """
+    family = (
+        select(RefreshToken.family)
+        .where(RefreshToken.token_hash == hash_refresh_token(refresh_token), RefreshToken.username == username)
+        .scalar_subquery()
+    )
+    await session.execute(delete(RefreshToken).where(RefreshToken.family == family))
+
+
+async def purge_expired_refresh_tokens(
+        session_factory: async_sessionmaker[AsyncSession],
+        batch_size: int,
+) -> int:
+    """
+    Purge Expired Refresh Tokens
+    ---
+    description: Deletes expired refresh tokens of all users, batch_size rows per transaction so
+        a large backlog does not hold locks or bloat one transaction. Uses the expires_at index.
+    parameters:
+        - name: session_factory
+          in: body
+          description: Factory of a session on the primary
+          required: true
+          schema:
+            type: object
+        - name: batch_size
+          in: body
+          description: Rows deleted per transaction
+          required: true
+          schema:
+            type: integer
+    responses:
+        200:
+            description: Returns the number of deleted tokens.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    expired = select(RefreshToken.id).where(RefreshToken.expires_at <= now).limit(batch_size)
+    purged = 0
+    while True:
+        async with session_factory() as session:
+            result = await session.execute(delete(RefreshToken).where(RefreshToken.id.in_(expired.scalar_subquery())))
+            await session.commit()
+        purged += result.rowcount
+        if result.rowcount < batch_size:
+            return purged
+
+
+async def run_refresh_token_purge(
+        session_factory: async_sessionmaker[AsyncSession],
+        interval: float,
+        batch_size: int,
+) -> None:
+    """
+    Run Refresh Token Purge
+    ---
+    description: Purges expired refresh tokens every interval seconds until cancelled. A failed
+        purge is retried on the next tick.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await purge_expired_refresh_tokens(session_factory, batch_size)
+        except Exception:
+            logger.exception("Refresh token purge failed")
+
+
+async def run_password_work(func, *args):
+    """
+    Run Password Work
+    ---
+    description: Runs a blocking password hashing call on password_executor instead of the event loop.
+        At most PASSWORD_HASH_WORKERS calls run at once, the rest wait for a free slot
+        for up to PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS. Calls beyond PASSWORD_HASH_MAX_QUEUE
+        waiting ones are rejected without waiting.
+    parameters:
+        - name: func
+          in: body
+          description: Blocking callable, e.g. pwd_context.hash
+          required: true
+          schema:
+            type: object
+        - name: args
+          in: body
+          description: Positional arguments for func
+          required: false
+          schema:
+            type: array
+    responses:
+        200:
+            description: Returns the result of func.
+        429:
+            description: The queue of password operations is full.
+        503:
+            description: No free slot within the queue timeout.
+    """
+    if not password_admission.try_acquire():
+        raise exceptions.TooManyRequests(detail="Too many password operations in progress, try again later")
+    try:
+        try:
+            await asyncio.wait_for(password_slots.acquire(), timeout=config.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            raise exceptions.ServiceUnavailable(detail="Too many password operations in progress, try again later")
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(password_executor, func, *args)
+        finally:
+            password_slots.release()
+    finally:
+        password_admission.release()
+
+
+async def verify_password(
         plain_password: str,
         hashed_password: str
 ):
@@ -215,10 +695,10 @@ def verify_password(
         400:
             description: Passwords do not match. Verification failed.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return await run_password_work(pwd_context.verify, plain_password, hashed_password)
 
 
-def get_password_hash(password: str):
+async def get_password_hash(password: str):
     """
     Get Password Hash
     ---
@@ -234,4 +714,4 @@ def get_password_hash(password: str):
         200:
             description: Successful hash generation. Returns the hashed password.
     """
-    return pwd_context.hash(password)
+    return await run_password_work(pwd_context.hash, password)
@@ -0,0 +1,181 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from app import exceptions
+from app.core.config import config
+
+
+class TokenBucketLimiter:
+    """
+    Token Bucket Limiter Class
+    ---
+    description: In-process token buckets, one per key. A bucket holds up to burst tokens and
+        refills at rate tokens per second; every attempt takes one token. Buckets are kept
+        in LRU order and bounded by maxsize, an evicted bucket starts full again.
+    """
+    def __init__(self, rate: float, burst: int, maxsize: int):
+        """
+        Constructor method to initialize the TokenBucketLimiter class.
+        ---
+        description: Initializes an empty limiter with the provided refill rate and bucket size.
+        parameters:
+            - name: rate
+              in: body
+              description: Tokens added to a bucket per second
+              required: true
+              schema:
+                type: number
+            - name: burst
+              in: body
+              description: Capacity of a bucket, i.e. attempts allowed at once
+              required: true
+              schema:
+                type: integer
+            - name: maxsize
+              in: body
+              description: Maximum number of tracked keys
+              required: true
+              schema:
+                type: integer
+        """
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[Hashable, tuple[float, float]] = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+
+    def acquire(self, key: Hashable) -> float:
+        """
+        Acquire
+        ---
+        description: Takes a token from the bucket of the key if there is one.
+        responses:
+            200:
+                description: Returns 0 if the attempt is allowed, otherwise the seconds until a token is available.
+        """
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        if tokens >= 1:
+            tokens -= 1
+            retry_after = 0.0
+            self.allowed += 1
+        else:
+            retry_after = (1 - tokens) / self.rate
+            self.rejected += 1
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    def stats(self) -> dict:
+        """
+        Stats
+        ---
+        description: Reports the number of tracked keys and the limiter counters.
+        responses:
+            200:
+                description: Returns size, maxsize, allowed and rejected.
+        """
+        return {
+            "size": len(self._buckets),
+            "maxsize": self.maxsize,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+        }
+
+
+class ConcurrencyLimiter:
+    """
+    Concurrency Limiter Class
+    ---
+    description: Caps the number of operations in progress. Unlike a semaphore it never waits,
+        an operation over the limit is rejected at once.
+    """
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self.rejected = 0
+
+    def try_acquire(self) -> bool:
+        """
+        Try Acquire
+        ---
+        description: Takes a slot if one is free.
+        responses:
+            200:
+                description: Returns True if the operation may start, release() must follow.
+        """
+        if self.in_use >= self.limit:
+            self.rejected += 1
+            return False
+        self.in_use += 1
+        return True
+
+    def release(self) -> None:
+        self.in_use -= 1
+
+    def stats(self) -> dict:
+        return {"limit": self.limit, "in_use": self.in_use, "rejected": self.rejected}
+
+
+username_limiter = TokenBucketLimiter(
+    rate=config.AUTH_USERNAME_RATE_PER_MINUTE / 60,
+    burst=config.AUTH_USERNAME_BURST,
+    maxsize=config.AUTH_RATE_LIMIT_KEYS,
+)
+ip_limiter = TokenBucketLimiter(
+    rate=config.AUTH_IP_RATE_PER_MINUTE / 60,
+    burst=config.AUTH_IP_BURST,
+    maxsize=config.AUTH_RATE_LIMIT_KEYS,
+)
+password_admission = ConcurrencyLimiter(limit=config.PASSWORD_HASH_WORKERS + config.PASSWORD_HASH_MAX_QUEUE)
+
+
+def rate_limit_stats() -> dict:
+    return {
+        "username": username_limiter.stats(),
+        "ip": ip_limiter.stats(),
+        "password_hashing": password_admission.stats(),
+    }
+
+
+def admit_auth_attempt(username: str, client_ip: str | None) -> None:
+    """
+    Admit Auth Attempt
+    ---
+    description: Rate limits login and registration attempts per client IP and per username
+        before any password hashing is done, so rotating addresses does not lift the limit on
+        one account. Does nothing if AUTH_RATE_LIMIT_ENABLED is false.
+    parameters:
+        - name: username
+          in: body
+          description: Username the attempt is made for
+          required: true
+          schema:
+            type: string
+        - name: client_ip
+          in: body
+          description: Address of the client, None if unknown
+          required: false
+          schema:
+            type: string
+    responses:
+        200:
+            description: The attempt may proceed.
+        429:
+            description: Too many attempts for the IP or the username, Retry-After tells when to retry.
+    """
+    if not config.AUTH_RATE_LIMIT_ENABLED:
+        return
+    retry_after = ip_limiter.acquire(client_ip) if client_ip else 0
+    if not retry_after:
+        retry_after = username_limiter.acquire(username.lower())
+    if retry_after:
+        raise exceptions.TooManyRequests(
+            detail="Too many authentication attempts, try again later",
+            retry_after=math.ceil(retry_after),
+        )
@@ -18,7 +18,17 @@ class UserCreate(UserBase):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: str | None = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 
 class TokenData(BaseModel):
     username: str | None = None
+
+
+class TokenUser(BaseModel):
+    username: str
+    permission: Permission
@@ -1,13 +1,14 @@
 from typing import Annotated
 from datetime import timedelta
 
-from fastapi import HTTPException, APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.models import db_helper
 from app.api.auth import helpers
-from app.api.auth.schemas import UserCreate
+from app.api.auth.rate_limit import admit_auth_attempt
+from app.api.auth.schemas import UserCreate, RefreshRequest
 from app.core.config import config
 
 router_token = APIRouter(tags=["Users"])
@@ -15,8 +16,9 @@ router_token = APIRouter(tags=["Users"])
 
 @router_token.post("/login")
 async def login(
+        request: Request,
         form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-        session: AsyncSession = Depends(db_helper.scoped_session_dependency)
+        session: AsyncSession = Depends(db_helper.session_dependency)
 ):
     """
     Login Endpoint
@@ -24,8 +26,11 @@ async def login(
     description: Authenticate user and generate access token.
     responses:
         200:
-            description: Successful login. Returns access token.
+            description: Successful login. Returns access token and refresh token.
+        429:
+            description: Too many attempts for the username or client IP.
     """
+    admit_auth_attempt(username=form_data.username, client_ip=request.client and request.client.host)
     user = await helpers.authenticate_user(
         username=form_data.username,
         password=form_data.password,
@@ -33,17 +38,49 @@ async def login(
     )
     access_token_expires = timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = helpers.create_access_token(
-        data={"sub": user.username},
+        data={"sub": user.username, "perm": user.permission.value},
         expires_delta=access_token_expires
     )
+    refresh_token = await helpers.issue_refresh_token(username=user.username, session=session)
+    await session.commit()
 
-    return {"access_token": access_token, "token_type": "bearer"}
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@router_token.post("/refresh")
+async def refresh(
+        refresh_data: RefreshRequest,
+        session: AsyncSession = Depends(db_helper.session_dependency)
+):
+    """
+    Refresh Endpoint
+    ---
+    description: Exchange a refresh token for a new access token and a new refresh token,
+        without verifying the password again. Every refresh token can be used once.
+    responses:
+        200:
+            description: Successful refresh. Returns access token and refresh token.
+        401:
+            description: Refresh token is invalid, expired or was already used.
+    """
+    user, refresh_token = await helpers.rotate_refresh_token(
+        refresh_token=refresh_data.refresh_token,
+        session=session
+    )
+    access_token_expires = timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = helpers.create_access_token(
+        data={"sub": user.username, "perm": user.permission.value},
+        expires_delta=access_token_expires
+    )
+
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
 
 
 @router_token.post("/registration")
 async def register(
+        request: Request,
         user_data: UserCreate,
-        session: AsyncSession = Depends(db_helper.scoped_session_dependency)
+        session: AsyncSession = Depends(db_helper.session_dependency)
 ):
     """
     Registration Endpoint
@@ -52,10 +89,41 @@ async def register(
     responses:
         200:
             description: Successful registration. Returns status "ok".
+        429:
+            description: Too many attempts for the username or client IP.
     """
-    reg_user = await helpers.registrate_user(
+    admit_auth_attempt(username=user_data.username, client_ip=request.client and request.client.host)
+    await helpers.registrate_user(
         user_data=user_data,
         session=session
     )
 
     return {"ok": True}
+
+
+@router_token.post("/logout")
+async def logout(
+        payload: Annotated[dict, Depends(helpers.get_token_payload)],
+        refresh_data: RefreshRequest | None = None,
+        session: AsyncSession = Depends(db_helper.session_dependency)
+):
+    """
+    Logout Endpoint
+    ---
+    description: Revoke the access token the request was made with. A refresh token passed in
+        the body is revoked with every token rotated from it, so the login can not be refreshed.
+    responses:
+        200:
+            description: Token revoked. Returns status "ok".
+        401:
+            description: Token is invalid or already revoked.
+    """
+    if refresh_data is not None:
+        await helpers.revoke_refresh_token_family(
+            refresh_token=refresh_data.refresh_token,
+            username=payload["sub"],
+            session=session
+        )
+    await helpers.revoke_token(payload=payload, session=session)
+
+    return {"ok": True}
@@ -1,17 +1,239 @@
-from sqlalchemy import select
+from functools import partial
+from math import ceil
+from typing import AsyncIterator, Sequence
+
+from sqlalchemy import select, update, delete, func, or_, text, tuple_, Row, Select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi_pagination.ext.sqlalchemy import paginate
-from fastapi_pagination import Page
+from fastapi_pagination import resolve_params
+
+from .schemas import (
+    Item as ItemRead,
+    ItemUpdate,
+    ItemCreate,
+    ItemCursorPage,
+    ItemRowsPage,
+    ItemRowsCursorPage,
+    ItemBulkCreateResult,
+    ItemBulkRowResult,
+    ItemFilter,
+    ItemSort,
+    ItemTotalMode,
+    ItemStats,
+    ItemCategoryStats as ItemCategoryStatsRead,
+)
+from .pagination import sort_key, encode_cursor, decode_cursor, search_position, SORT_VALUE_PARSERS
+from app.core.models import db_helper, Item, ItemCategoryStats
+from app.core.models.item import ItemCategory
+from app.core.cache import create_cache
+from app.core.config import config
+
+STREAM_BATCH_SIZE = 1000
+
+item_cache = create_cache(
+    backend=config.item_cache_backend,
+    maxsize=config.item_cache_size,
+    ttl=config.item_cache_ttl_seconds,
+)
+
+total_cache = create_cache(
+    backend=config.item_cache_backend,
+    maxsize=1024,
+    ttl=config.items_total_cache_ttl_seconds,
+)
+
+ITEM_COLUMNS = (
+    Item.id,
+    Item.name,
+    Item.description,
+    Item.category,
+    Item.quantity,
+    Item.price,
+    Item.created_at,
+    Item.version,
+)
+
+ITEM_FIELDS = tuple(column.key for column in ITEM_COLUMNS)
+
+SEARCH_CONFIG = "english"
+
+SORT_COLUMNS = {
+    "created_at": Item.created_at,
+    "name": Item.name,
+    "price": Item.price,
+    "quantity": Item.quantity,
+}
+
+
+def item_columns(fields: Sequence[str] | None, *required) -> tuple:
+    """
+    Item Columns
+    ---
+    description: Picks the columns of ITEM_COLUMNS to select for a sparse fieldset.
+    parameters:
+        - name: fields
+          in: query
+          description: Requested fields, all of ITEM_FIELDS if omitted
+          required: false
+          schema:
+            type: array
+        - name: required
+          in: body
+          description: Columns selected even if they were not requested, e.g. Item.id for ETags
+          required: false
+          schema:
+            type: array
+    responses:
+        200:
+            description: Returns the columns in ITEM_COLUMNS order.
+    """
+    if fields is None:
+        return ITEM_COLUMNS
+    keys = set(fields) | {column.key for column in required}
+    return tuple(column for column in ITEM_COLUMNS if column.key in keys)
+
+
+def filter_items(stmt: Select, filters: ItemFilter | None) -> Select:
+    """
+    Filter Items
+    ---
+    description: Adds the WHERE clauses of an item filter to a statement selecting from items.
+    parameters:
+        - name: stmt
+          in: body
+          description: Statement to filter
+          required: true
+          schema:
+            type: object
+        - name: filters
+          in: query
+          description: Filter to apply, None leaves the statement untouched
+          required: false
+          schema:
+            $ref: '#/components/schemas/ItemFilter'
+    responses:
+        200:
+            description: Returns the filtered statement.
+    """
+    if filters is None:
+        return stmt
+    if filters.category is not None:
+        stmt = stmt.where(Item.category == filters.category)
+    if filters.min_price is not None:
+        stmt = stmt.where(Item.price >= filters.min_price)
+    if filters.max_price is not None:
+        stmt = stmt.where(Item.price <= filters.max_price)
+    if filters.min_quantity is not None:
+        stmt = stmt.where(Item.quantity >= filters.min_quantity)
+    if filters.max_quantity is not None:
+        stmt = stmt.where(Item.quantity <= filters.max_quantity)
+    if filters.created_from is not None:
+        stmt = stmt.where(Item.created_at >= filters.created_from)
+    if filters.created_to is not None:
+        stmt = stmt.where(Item.created_at < filters.created_to)
+    return stmt
+
+
+def sort_items(stmt: Select, sort: ItemSort | None) -> Select:
+    """
+    Sort Items
+    ---
+    description: Orders a statement selecting from items by the whitelisted sort field, with id as tiebreaker.
+    parameters:
+        - name: stmt
+          in: body
+          description: Statement to order
+          required: true
+          schema:
+            type: object
+        - name: sort
+          in: query
+          description: Sort field and direction, newest first by default
+          required: false
+          schema:
+            $ref: '#/components/schemas/ItemSort'
+    responses:
+        200:
+            description: Returns the ordered statement.
+    """
+    sort = sort or ItemSort()
+    column = SORT_COLUMNS[sort.sort_by]
+    if sort.order == "asc":
+        return stmt.order_by(column.asc(), Item.id.asc())
+    return stmt.order_by(column.desc(), Item.id.desc())
+
+
+async def count_items(
+        session: AsyncSession,
+        filters: ItemFilter | None = None,
+        mode: ItemTotalMode = "exact",
+) -> int | None:
+    """
+    Count Items
+    ---
+    description: Counts the items matching a filter in the requested mode.
+        "exact" runs SELECT count(*), "cached" reuses an exact count until the next write or
+        for items_total_cache_ttl_seconds, "estimated" reads the planner estimate from
+        pg_class.reltuples (filtered lists fall back to "cached"), "none" skips counting.
+    parameters:
+        - name: session
+          in: body
+          description: AsyncSession object for database access
+          required: true
+          schema:
+            type: object
+        - name: filters
+          in: query
+          description: Filter to apply
+          required: false
+          schema:
+            $ref: '#/components/schemas/ItemFilter'
+        - name: mode
+          in: query
+          description: One of "exact", "cached", "estimated", "none"
+          required: false
+          schema:
+            type: string
+    responses:
+        200:
+            description: Returns the number of items, or None in "none" mode.
+    """
+    if mode == "none":
+        return None
+    if mode == "estimated" and (filters is None or not filters.model_dump(exclude_none=True)):
+        result = await session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'items'::regclass")
+        )
+        estimate = result.scalar()
+        if estimate is not None and estimate >= 0:
+            return estimate
+        mode = "cached"
 
-from .schemas import ItemUpdate, ItemCreate
-from app.core.models import Item
+    stmt = filter_items(select(func.count()).select_from(Item), filters)
+    if mode == "exact":
+        return await session.scalar(stmt)
 
+    key = filters.model_dump_json() if filters is not None else ""
+    total = await total_cache.get(key)
+    if total is None:
+        total = await session.scalar(stmt)
+        await total_cache.set(key, total)
+    return total
 
-async def get_items(session: AsyncSession) -> Page[Item]:
+
+async def get_items(
+        session: AsyncSession,
+        filters: ItemFilter | None = None,
+        sort: ItemSort | None = None,
+        total_mode: ItemTotalMode | None = None,
+        fields: Sequence[str] | None = None,
+) -> ItemRowsPage:
     """
     Get Items
     ---
-    description: Retrieves a paginated list of items ordered by creation date.
+    description: Retrieves a paginated list of items, filtered and sorted in SQL.
+        Fetches plain rows of the requested columns instead of ORM objects, the page is
+        serialized as is by responses.items_page_response.
     parameters:
         - name: session
           in: body
@@ -19,20 +241,292 @@ async def get_items(session: AsyncSession) -> Page[Item]:
           required: true
           schema:
             type: object
+        - name: filters
+          in: query
+          description: Filter to apply
+          required: false
+          schema:
+            $ref: '#/components/schemas/ItemFilter'
+        - name: sort
+          in: query
+          description: Sort field and direction, newest first by default
+          required: false
+          schema:
+            $ref: '#/components/schemas/ItemSort'
+        - name: total_mode
+          in: query
+          description: How to compute the total, see count_items, items_total_mode by default
+          required: false
+          schema:
+            type: string
+        - name: fields
+          in: query
+          description: Fields to select, id and version are always selected for the ETag
+          required: false
+          schema:
+            type: array
     responses:
         200:
-            description: Returns a paginated list of items.
+            description: Returns a paginated list of item rows.
     """
-    stmt = select(Item).order_by(Item.created_at.desc())
-    result = await paginate(session, stmt)
-    return result
+    params = resolve_params()
+    raw_params = params.to_raw_params()
+    columns = item_columns(fields, Item.id, Item.version)
+    stmt = sort_items(filter_items(select(*columns), filters), sort)
+    result = await session.execute(stmt.limit(raw_params.limit).offset(raw_params.offset))
+    items = result.all()
+    total = await count_items(session=session, filters=filters, mode=total_mode or config.items_total_mode)
+    return {
+        "items": items,
+        "total": total,
+        "page": params.page,
+        "size": params.size,
+        "pages": ceil(total / params.size) if total is not None else None,
+    }
 
 
-async def get_item(session: AsyncSession, item_id: int) -> Item | None:
+async def get_items_by_cursor(
+        session: AsyncSession,
+        cursor: str | None = None,
+        size: int = 50,
+        filters: ItemFilter | None = None,
+        sort: ItemSort | None = None,
+) -> ItemRowsCursorPage:
+    """
+    Get Items by Cursor
+    ---
+    description: Retrieves a page of items using keyset pagination.
+        Every page is a range scan over the (sort field, id) index, so its cost does not
+        depend on how deep into the list the client is. Items are plain rows of ITEM_COLUMNS.
+    parameters:
+        - name: session
+          in: body
+          description: AsyncSession object for database access
+          required: true
+          schema:
+            type: object
+        - name: cursor
+          in: query
+          description: Cursor returned with the previous page, omit for the first page
+          required: false
+          schema:
+            type: string
+        - name: size
+          in: query
+          description: Page size
+          required: false
+          schema:
+            type: integer
+        - name: filters
+          in: query
+          description: Filter to apply
+          required: false
+          schema:
+            $ref: '#/components/schemas/ItemFilter'
+        - name: sort
+          in: query
+          description: Sort field and direction, newest first by default
+          required: false
+          schema:
+            $ref: '#/components/schemas/ItemSort'
+    responses:
+        200:
+            description: Returns a page of item rows and the cursor of the next page.
+        400:
+            description: Cursor is malformed or does not match the sort field.
+    """
+    sort = sort or ItemSort()
+    column = SORT_COLUMNS[sort.sort_by]
+    stmt = sort_items(filter_items(select(*ITEM_COLUMNS), filters), sort)
+    if cursor is not None:
+        value, item_id = decode_cursor(cursor, sort_key(sort), SORT_VALUE_PARSERS[sort.sort_by])
+        keyset, after = tuple_(column, Item.id), tuple_(value, item_id)
+        stmt = stmt.where(keyset > after if sort.order == "asc" else keyset < after)
+    result = await session.execute(stmt.limit(size + 1))
+    items = result.all()
+
+    next_cursor = None
+    if len(items) > size:
+        items = items[:size]
+        next_cursor = encode_cursor(sort_key(sort), getattr(items[-1], sort.sort_by), items[-1].id)
+    return {"items": items, "size": size, "next_cursor": next_cursor}
+
+
+async def search_items(
+        session: AsyncSession,
+        q: str,
+        cursor: str | None = None,
+        size: int = 50,
+        filters: ItemFilter | None = None,
+) -> ItemCursorPage:
+    """
+    Search Items
+    ---
+    description: Retrieves items matching a search query, best matches first, using keyset pagination.
+        Matches the full-text search_vector of name and description, or a name or description
+        that is fuzzily similar to the query (pg_trgm word similarity), all served by GIN indexes.
+        No index orders by rank, so every page ranks and sorts all matches and a deep page costs
+        as much as the first; the cursor counts the items served and paging stops after
+        item_search_max_results of them.
+    parameters:
+        - name: session
+          in: body
+          description: AsyncSession object for database access
+          required: true
+          schema:
+            type: object
+        - name: q
+          in: query
+          description: Search query, web search syntax ("quoted phrases", -excluded words)
+          required: true
+          schema:
+            type: string
+        - name: cursor
+          in: query
+          description: Cursor returned with the previous page, omit for the first page
+          required: false
+          schema:
+            type: string
+        - name: size
+          in: query
+          description: Page size
+          required: false
+          schema:
+            type: integer
+        - name: filters
+          in: query
+          description: Filter to apply
+          required: false
+          schema:
+            $ref: '#/components/schemas/ItemFilter'
+    responses:
+        200:
+            description: Returns a page of ranked items and the cursor of the next page.
+        400:
+            description: Cursor is malformed or its position is out of range.
+    """
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = (
+        func.ts_rank(Item.search_vector, query)
+        + func.word_similarity(q, Item.name)
+        + 0.5 * func.word_similarity(q, Item.description)
+    )
+    stmt = filter_items(select(Item, rank), filters).where(
+        or_(
+            Item.search_vector.op("@@")(query),
+            Item.name.op("%>")(q),
+            Item.description.op("%>")(q),
+        )
+    )
+    served = 0
+    if cursor is not None:
+        parse_value = partial(search_position, max_results=config.item_search_max_results)
+        (value, served), item_id = decode_cursor(cursor, "rank", parse_value)
+        stmt = stmt.where(tuple_(rank, Item.id) < tuple_(value, item_id))
+    size = max(min(size, config.item_search_max_results - served), 0)
+    result = await session.execute(stmt.order_by(rank.desc(), Item.id.desc()).limit(size + 1))
+    rows = list(result)
+
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        if served + size < config.item_search_max_results:
+            next_cursor = encode_cursor("rank", [rows[-1][1], served + size], rows[-1][0].id)
+    return ItemCursorPage(items=[row[0] for row in rows], size=size, next_cursor=next_cursor)
+
+
+async def stream_items(
+        session: AsyncSession,
+        filters: ItemFilter | None = None,
+        fields: Sequence[str] | None = None,
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Stream Items
+    ---
+    description: Iterates over all matching items through a server-side cursor.
+        Yields plain rows in batches of STREAM_BATCH_SIZE instead of loading ORM objects,
+        filters are applied in SQL.
+    parameters:
+        - name: session
+          in: body
+          description: AsyncSession object for database access
+          required: true
+          schema:
+            type: object
+        - name: filters
+          in: query
+          description: Filter to apply
+          required: false
+          schema:
+            $ref: '#/components/schemas/ItemFilter'
+        - name: fields
+          in: query
+          description: Fields to select, all of ITEM_FIELDS if omitted
+          required: false
+          schema:
+            type: array
+    responses:
+        200:
+            description: Yields batches of item rows ordered by creation date.
+    """
+    stmt = sort_items(filter_items(select(*item_columns(fields)), filters), None)
+    result = await session.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+    async for rows in result.partitions():
+        yield rows
+
+
+async def get_item_stats(session: AsyncSession) -> ItemStats:
+    """
+    Get Item Stats
+    ---
+    description: Reads the per-category item count, total quantity, total stock value and
+        out of stock count from item_category_stats, which the database keeps up to date on
+        every item write. Sums the shards of each category, so it costs ITEM_STATS_SHARDS rows
+        per category regardless of the number of items.
+    parameters:
+        - name: session
+          in: body
+          description: AsyncSession object for database access
+          required: true
+          schema:
+            type: object
+    responses:
+        200:
+            description: Returns the stats of every category and their sums.
+    """
+    result = await session.execute(
+        select(
+            ItemCategoryStats.category,
+            func.sum(ItemCategoryStats.item_count).label("item_count"),
+            func.sum(ItemCategoryStats.total_quantity).label("total_quantity"),
+            func.sum(ItemCategoryStats.total_value).label("total_value"),
+            func.sum(ItemCategoryStats.out_of_stock).label("out_of_stock"),
+        ).group_by(ItemCategoryStats.category)
+    )
+    stats = {row.category: ItemCategoryStatsRead.model_validate(row) for row in result}
+    categories = [stats.get(category, ItemCategoryStatsRead(category=category)) for category in ItemCategory]
+    return ItemStats(
+        categories=categories,
+        item_count=sum(category.item_count for category in categories),
+        total_quantity=sum(category.total_quantity for category in categories),
+        total_value=sum(category.total_value for category in categories),
+        out_of_stock=sum(category.out_of_stock for category in categories),
+    )
+
+
+async def get_item(
+        session: AsyncSession,
+        item_id: int,
+        fields: Sequence[str] | None = None,
+) -> ItemRead | Row | None:
     """
     Get Item by ID
     ---
     description: Retrieves the item with the specified ID.
+        Reads through item_cache, the database is only queried on a miss. With fields a miss
+        selects only those columns plus id and version, and the row is not cached. Misses are
+        only cached when read from the primary, a lagging replica could return an item as it
+        was before a write that already invalidated its entry.
     parameters:
         - name: session
           in: body
@@ -46,13 +540,59 @@ async def get_item(session: AsyncSession, item_id: int) -> Item | None:
           required: true
           schema:
             type: integer
+        - name: fields
+          in: query
+          description: Fields to select, the whole item if omitted
+          required: false
+          schema:
+            type: array
     responses:
         200:
             description: Returns the item with the specified ID.
         404:
             description: Item not found.
     """
-    return await session.get(Item, item_id)
+    cached = await item_cache.get(item_id)
+    if cached is not None:
+        return cached
+    if fields is not None:
+        columns = item_columns(fields, Item.id, Item.version)
+        result = await session.execute(select(*columns).where(Item.id == item_id))
+        return result.first()
+    item = await session.get(Item, item_id)
+    if item is None:
+        return None
+    item_read = ItemRead.model_validate(item)
+    if db_helper.is_primary(session):
+        await item_cache.set(item_id, item_read)
+    return item_read
+
+
+async def item_exists(session: AsyncSession, item_id: int) -> bool:
+    """
+    Item Exists
+    ---
+    description: Checks in the database whether the item with the specified ID exists, bypassing
+        item_cache. Used to tell apart why a write matched no row, where a stale cache entry of
+        a deleted item would give the wrong answer.
+    parameters:
+        - name: session
+          in: body
+          description: AsyncSession object for database access, of the primary
+          required: true
+          schema:
+            type: object
+        - name: item_id
+          in: path
+          description: ID of the item to look up
+          required: true
+          schema:
+            type: integer
+    responses:
+        200:
+            description: Returns whether the item exists.
+    """
+    return await session.scalar(select(Item.id).where(Item.id == item_id)) is not None
 
 
 async def create_item(session: AsyncSession, item_in: ItemCreate) -> Item:
@@ -80,19 +620,85 @@ async def create_item(session: AsyncSession, item_in: ItemCreate) -> Item:
     item = Item(**item_in.model_dump())
     session.add(item)
     await session.commit()
+    await item_cache.set(item.id, ItemRead.model_validate(item))
+    await total_cache.clear()
     return item
 
 
+async def create_items_bulk(session: AsyncSession, items_in: list[ItemCreate]) -> ItemBulkCreateResult:
+    """
+    Create Items in Bulk
+    ---
+    description: Creates many items in a single transaction.
+        Rows are sent as batched multi-row INSERT ... ON CONFLICT (name) DO NOTHING RETURNING
+        statements, so a name that already exists is reported as a conflict for that row
+        instead of aborting the whole batch the way COPY would.
+    parameters:
+        - name: session
+          in: body
+          description: AsyncSession object for database access
+          required: true
+          schema:
+            type: object
+        - name: items_in
+          in: body
+          description: Data for creating the new items
+          required: true
+          schema:
+            type: array
+            items:
+              $ref: '#/components/schemas/ItemCreate'
+    responses:
+        200:
+            description: Returns the result for every row in request order.
+    """
+    rows = {}
+    duplicates = set()
+    for index, item_in in enumerate(items_in):
+        if item_in.name in rows:
+            duplicates.add(index)
+        else:
+            rows[item_in.name] = item_in.model_dump()
+
+    created_ids = {}
+    if rows:
+        stmt = insert(Item).on_conflict_do_nothing(index_elements=[Item.name]).returning(Item.id, Item.name)
+        result = await session.execute(stmt, list(rows.values()))
+        created_ids = {name: item_id for item_id, name in result}
+        await session.commit()
+        await total_cache.clear()
+
+    results = []
+    for index, item_in in enumerate(items_in):
+        if index in duplicates:
+            results.append(ItemBulkRowResult(
+                index=index, status="conflict", detail="Duplicate name in request"
+            ))
+        elif item_in.name in created_ids:
+            results.append(ItemBulkRowResult(index=index, status="created", id=created_ids[item_in.name]))
+        else:
+            results.append(ItemBulkRowResult(
+                index=index, status="conflict", detail=f"Item {item_in.name} already exists"
+            ))
+    return ItemBulkCreateResult(
+        created=len(created_ids),
+        conflicts=len(items_in) - len(created_ids),
+        results=results,
+    )
+
+
 async def update_item(
         session: AsyncSession,
-        item: Item,
+        item_id: int,
         item_update: ItemUpdate,
         partial: bool = False,
-) -> Item:
+        expected_versions: list[int] | None = None,
+) -> ItemRead | None:
     """
     Update Item
     ---
-    description: Updates the details of the specified item.
+    description: Updates the details of the item with the specified ID.
+        Issues a single UPDATE ... RETURNING statement instead of loading the row first.
     parameters:
         - name: session
           in: body
@@ -100,12 +706,12 @@ async def update_item(
           required: true
           schema:
             type: object
-        - name: item
-          in: body
-          description: Item to be updated
+        - name: item_id
+          in: path
+          description: ID of the item to update
           required: true
           schema:
-            $ref: '#/components/schemas/Item'
+            type: integer
         - name: item_update
           in: body
           description: Data for updating the item
@@ -118,25 +724,118 @@ async def update_item(
           required: false
           schema:
             type: boolean
+        - name: expected_versions
+          in: header
+          description: Only update the item if its current version is one of these (If-Match)
+          required: false
+          schema:
+            type: array
     responses:
         200:
             description: Returns the updated item.
+        404:
+            description: Item not found or its version was not expected, None is returned and
+                nothing is committed, so the caller can find out why in the same transaction.
     """
-    for name, value in item_update.model_dump(exclude_unset=partial).items():
-        if value is not None:
-            setattr(item, name, value)
+    values = {
+        name: value
+        for name, value in item_update.model_dump(exclude_unset=partial).items()
+        if value is not None
+    }
+    if not values:
+        item = await get_item(session=session, item_id=item_id)
+        if item is None or (expected_versions is not None and item.version not in expected_versions):
+            return None
+        return item
+
+    stmt = (
+        update(Item)
+        .where(Item.id == item_id)
+        .values(**values, version=Item.version + 1)
+        .returning(Item)
+    )
+    if expected_versions is not None:
+        stmt = stmt.where(Item.version.in_(expected_versions))
+    result = await session.execute(stmt)
+    item = result.scalars().first()
+    if item is None:
+        return None
     await session.commit()
-    return item
+    item_read = ItemRead.model_validate(item)
+    await item_cache.set(item_id, item_read)
+    await total_cache.clear()
+    return item_read
+
+
+async def adjust_item_quantity(
+        session: AsyncSession,
+        item_id: int,
+        delta: int,
+        prevent_negative: bool = False,
+) -> int | None:
+    """
+    Adjust Item Quantity
+    ---
+    description: Atomically adds a signed delta to the quantity of the specified item.
+        Runs UPDATE ... SET quantity = quantity + :delta in the database, so concurrent
+        adjustments of the same item are applied one after another and none is lost.
+    parameters:
+        - name: session
+          in: body
+          description: AsyncSession object for database access
+          required: true
+          schema:
+            type: object
+        - name: item_id
+          in: path
+          description: ID of the item to adjust
+          required: true
+          schema:
+            type: integer
+        - name: delta
+          in: body
+          description: Signed amount to add to the quantity
+          required: true
+          schema:
+            type: integer
+        - name: prevent_negative
+          in: body
+          description: Leave the item untouched if the quantity would drop below zero
+          required: false
+          schema:
+            type: boolean
+    responses:
+        200:
+            description: Returns the new quantity, or None if the item does not exist or the guard rejected the change.
+                Nothing is committed then, so the caller can find out why in the same transaction.
+    """
+    stmt = (
+        update(Item)
+        .where(Item.id == item_id)
+        .values(quantity=Item.quantity + delta, version=Item.version + 1)
+        .returning(Item.quantity)
+    )
+    if prevent_negative:
+        stmt = stmt.where(Item.quantity + delta >= 0)
+    result = await session.execute(stmt)
+    quantity = result.scalar_one_or_none()
+    if quantity is None:
+        return None
+    await session.commit()
+    await item_cache.delete(item_id)
+    await total_cache.clear()
+    return quantity
 
 
 async def delete_item(
         session: AsyncSession,
-        item: Item,
-) -> None:
+        item_id: int,
+        expected_versions: list[int] | None = None,
+) -> bool:
     """
     Delete Item
     ---
-    description: Deletes the specified item.
+    description: Deletes the item with the specified ID with a single DELETE ... RETURNING statement.
     parameters:
         - name: session
           in: body
@@ -144,15 +843,30 @@ async def delete_item(
           required: true
           schema:
             type: object
-        - name: item
-          in: body
-          description: Item to be deleted
+        - name: item_id
+          in: path
+          description: ID of the item to delete
           required: true
           schema:
-            $ref: '#/components/schemas/Item'
+            type: integer
+        - name: expected_versions
+          in: header
+          description: Only delete the item if its current version is one of these (If-Match)
+          required: false
+          schema:
+            type: array
     responses:
-        204:
-            description: No content.
+        200:
+            description: Returns whether the item was deleted. Nothing is committed if it was not,
+                so the caller can find out why in the same transaction.
     """
-    await session.delete(item)
+    stmt = delete(Item).where(Item.id == item_id).returning(Item.id)
+    if expected_versions is not None:
+        stmt = stmt.where(Item.version.in_(expected_versions))
+    result = await session.execute(stmt)
+    if result.scalar_one_or_none() is None:
+        return False
     await session.commit()
+    await item_cache.delete(item_id)
+    await total_cache.clear()
+    return True
@@ -1,17 +1,28 @@
-from typing import Annotated
+import datetime
+from typing import Annotated, Sequence
 
-from fastapi import Path, Depends, HTTPException, status, Request
+from fastapi import Path, Depends, HTTPException, status, Request, Query
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from . import crud
+from .schemas import Item, ItemCreate, ItemFilter
+from app.core.models.item import ItemCategory
 from app.core.models import db_helper
-from app.core.models import Item
+from app.api.auth.helpers import get_current_user
+from app.api.auth.schemas import TokenUser
 from app import exceptions
+from app.core.config import config
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+items_create_adapter = TypeAdapter(list[ItemCreate])
 
 
 async def item_by_id(
         item_id: Annotated[int, Path],
-        session: AsyncSession = Depends(db_helper.scoped_session_dependency),
+        session: AsyncSession = Depends(db_helper.session_dependency),
 ) -> Item:
     """
     Get Item by ID
@@ -43,3 +54,169 @@ async def item_by_id(
     raise exceptions.ContentNotFound(
         detail=f"Item {item_id} not found!"
     )
+
+
+async def bulk_items_in(
+        request: Request,
+        current_user: Annotated[TokenUser, Depends(get_current_user)],
+) -> list[ItemCreate]:
+    """
+    Bulk Items In
+    ---
+    description: Parses the body of a bulk creation request into a list of ItemCreate.
+        Accepts either a JSON array or NDJSON (one item per line, "application/x-ndjson"),
+        the latter is validated line by line while it is being received. The write
+        permission is checked first, so users who may not create items can not make the
+        server read and validate a large body.
+    parameters:
+        - name: request
+          in: body
+          description: Incoming request with a JSON array or NDJSON body
+          required: true
+          schema:
+            type: object
+    responses:
+        200:
+            description: Returns the validated items.
+        400:
+            description: More items than bulk_create_max_items.
+        401:
+            description: User does not have full access permission.
+        422:
+            description: Body or one of its items is invalid.
+    """
+    if current_user.permission.value != "full_access":
+        raise exceptions.Unauthorized(detail="You don't have permissions!")
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith(NDJSON_MEDIA_TYPE):
+            items = await _ndjson_items(request)
+        else:
+            items = items_create_adapter.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors()])
+
+    if len(items) > config.bulk_create_max_items:
+        raise exceptions.BadDataFormat(
+            detail=f"Too many items, at most {config.bulk_create_max_items} per request!"
+        )
+    return items
+
+
+async def _ndjson_items(request: Request) -> list[ItemCreate]:
+    items = []
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                items.append(_ndjson_item(line, len(items)))
+        if len(items) > config.bulk_create_max_items:
+            break
+    if buffer.strip():
+        items.append(_ndjson_item(buffer, len(items)))
+    return items
+
+
+def _ndjson_item(line: bytes, index: int) -> ItemCreate:
+    try:
+        return ItemCreate.model_validate_json(line)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", index, *error["loc"])} for error in e.errors()]
+        )
+
+
+async def item_fields(
+        fields: Annotated[
+            str | None,
+            Query(description=f"Comma separated fields to return, any of {', '.join(crud.ITEM_FIELDS)}"),
+        ] = None,
+) -> Sequence[str] | None:
+    """
+    Item Fields
+    ---
+    description: Parses the sparse fieldset of a request, e.g. "id,name,quantity".
+    parameters:
+        - name: fields
+          in: query
+          description: Comma separated field names
+          required: false
+          schema:
+            type: string
+    responses:
+        200:
+            description: Returns the fields in ITEM_FIELDS order, or None for the whole item.
+        400:
+            description: Unknown or no field requested.
+    """
+    if fields is None:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested.difference(crud.ITEM_FIELDS)
+    if not requested:
+        raise exceptions.BadDataFormat(detail="No fields requested!")
+    if unknown:
+        raise exceptions.BadDataFormat(detail=f"Unknown fields: {', '.join(sorted(unknown))}!")
+    return tuple(field for field in crud.ITEM_FIELDS if field in requested)
+
+
+async def item_filters(
+        category: ItemCategory | None = None,
+        min_price: Annotated[float | None, Query(ge=0)] = None,
+        max_price: Annotated[float | None, Query(ge=0)] = None,
+        min_quantity: int | None = None,
+        max_quantity: int | None = None,
+        created_from: datetime.datetime | None = None,
+        created_to: datetime.datetime | None = None,
+) -> ItemFilter:
+    """
+    Item Filters
+    ---
+    description: Builds the ItemFilter of a request from its query parameters.
+        The constraints are declared on the parameters, so invalid values are rejected with
+        422 before the model is built; errors of the model itself are reported the same way.
+    responses:
+        200:
+            description: Returns the filter, timestamps with a time zone converted to naive UTC.
+        422:
+            description: A filter value is invalid, e.g. a negative price.
+    """
+    try:
+        return ItemFilter(
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            min_quantity=min_quantity,
+            max_quantity=max_quantity,
+            created_from=created_from,
+            created_to=created_to,
+        )
+    except ValidationError as e:
+        raise RequestValidationError([{**error, "loc": ("query", *error["loc"])} for error in e.errors()])
+
+
+async def read_item_by_id(
+        item_id: Annotated[int, Path],
+        fields: Annotated[Sequence[str] | None, Depends(item_fields)],
+        session: AsyncSession = Depends(db_helper.read_session_dependency),
+) -> Item:
+    """
+    Read Item by ID
+    ---
+    description: Same as item_by_id, but reads through a replica session when replicas are configured
+        and only selects the requested fields. Only for routes that do not modify the item.
+    responses:
+        200:
+            description: Returns the details of the item with the specified ID.
+        404:
+            description: Returns a 404 error if the item does not exist.
+    """
+    item = await crud.get_item(session=session, item_id=item_id, fields=fields)
+    if item is not None:
+        return item
+
+    raise exceptions.ContentNotFound(
+        detail=f"Item {item_id} not found!"
+    )
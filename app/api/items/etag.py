@@ -0,0 +1,114 @@
+import hashlib
+import json
+from typing import Iterable, Protocol
+
+
+class Versioned(Protocol):
+    id: int
+    version: int
+
+
+def item_etag(item: Versioned) -> str:
+    """
+    Item ETag
+    ---
+    description: Builds the strong ETag of a single item from its id and row version.
+    parameters:
+        - name: item
+          in: body
+          description: Item with id and version
+          required: true
+          schema:
+            $ref: '#/components/schemas/Item'
+    responses:
+        200:
+            description: Returns the quoted ETag.
+    """
+    return f'"{item.id}-{item.version}"'
+
+
+def items_etag(items: Iterable[Versioned], **meta) -> str:
+    """
+    Items ETag
+    ---
+    description: Builds the ETag of a page of items from the ids and versions of its items
+        and the page metadata, without serializing the items themselves.
+    parameters:
+        - name: items
+          in: body
+          description: Items of the page
+          required: true
+          schema:
+            type: array
+        - name: meta
+          in: body
+          description: Other fields of the page body, e.g. total or next_cursor
+          required: false
+          schema:
+            type: object
+    responses:
+        200:
+            description: Returns the quoted ETag.
+    """
+    raw = json.dumps([[[item.id, item.version] for item in items], meta], sort_keys=True, default=str)
+    return f'"{hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    ETag Matches
+    ---
+    description: Checks an If-None-Match header against the current ETag (weak comparison).
+    parameters:
+        - name: if_none_match
+          in: header
+          description: Value of the If-None-Match header
+          required: false
+          schema:
+            type: string
+        - name: etag
+          in: body
+          description: Current ETag of the resource
+          required: true
+          schema:
+            type: string
+    responses:
+        200:
+            description: Returns True if the client copy is current and 304 can be sent.
+    """
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def if_match_versions(if_match: str | None, item_id: int) -> list[int] | None:
+    """
+    If-Match Versions
+    ---
+    description: Extracts the item versions a conditional write is allowed to replace.
+    parameters:
+        - name: if_match
+          in: header
+          description: Value of the If-Match header
+          required: false
+          schema:
+            type: string
+        - name: item_id
+          in: path
+          description: ID of the item being written
+          required: true
+          schema:
+            type: integer
+    responses:
+        200:
+            description: Returns the allowed versions, or None if the write is unconditional.
+    """
+    if not if_match or if_match.strip() == "*":
+        return None
+    versions = []
+    for candidate in if_match.split(","):
+        etag_id, _, version = candidate.strip().strip('"').partition("-")
+        if etag_id == str(item_id) and version.isdigit():
+            versions.append(int(version))
+    return versions
@@ -0,0 +1,168 @@
+import base64
+import datetime
+import json
+import math
+from typing import Any, Callable
+
+from .schemas import ItemSort
+from app import exceptions
+
+
+def _integer(value: Any) -> int:
+    # bool is an int subclass; the range is that of the INTEGER columns.
+    if isinstance(value, bool) or not isinstance(value, int) or not -2 ** 31 <= value < 2 ** 31:
+        raise ValueError(value)
+    return value
+
+
+def _number(value: Any) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(value)
+    return float(value)
+
+
+def _string(value: Any) -> str:
+    if not isinstance(value, str):
+        raise ValueError(value)
+    return value
+
+
+def _naive_datetime(value: Any) -> datetime.datetime:
+    moment = datetime.datetime.fromisoformat(value["datetime"])
+    if moment.tzinfo is not None:
+        raise ValueError(value)
+    return moment
+
+
+# Parses the cursor value of each sort field into the type of its column, so a forged cursor
+# is rejected with 400 instead of failing in the driver.
+SORT_VALUE_PARSERS: dict[str, Callable[[Any], Any]] = {
+    "created_at": _naive_datetime,
+    "name": _string,
+    "price": _number,
+    "quantity": _integer,
+}
+
+
+def search_position(value: Any, max_results: int) -> tuple[float, int]:
+    """
+    Search Position
+    ---
+    description: Parses the cursor value of a search page, the [rank, served] pair of the last
+        returned item and the number of results served before the next page.
+    parameters:
+        - name: value
+          in: body
+          description: Decoded cursor value
+          required: true
+          schema:
+            type: array
+        - name: max_results
+          in: body
+          description: Number of results a search serves at most, see ITEM_SEARCH_MAX_RESULTS
+          required: true
+          schema:
+            type: integer
+    responses:
+        200:
+            description: Returns the (rank, served) tuple, raises ValueError if it does not fit.
+    """
+    if not isinstance(value, list) or len(value) != 2:
+        raise ValueError(value)
+    rank, served = _number(value[0]), _integer(value[1])
+    if not 0 <= served < max_results:
+        raise ValueError(value)
+    return rank, served
+
+
+def sort_key(sort: ItemSort) -> str:
+    """
+    Sort Key
+    ---
+    description: Names the order a keyset cursor was issued for, e.g. "price:asc".
+    parameters:
+        - name: sort
+          in: query
+          description: Sort field and direction of the page
+          required: true
+          schema:
+            $ref: '#/components/schemas/ItemSort'
+    responses:
+        200:
+            description: Returns the key to pass to encode_cursor and decode_cursor.
+    """
+    return f"{sort.sort_by}:{sort.order}"
+
+
+def encode_cursor(key: str, value: Any, item_id: int) -> str:
+    """
+    Encode Cursor
+    ---
+    description: Packs the (sort value, id) keyset of the last returned item into an opaque cursor.
+    parameters:
+        - name: key
+          in: query
+          description: Name of the order the page is sorted in, see sort_key
+          required: true
+          schema:
+            type: string
+        - name: value
+          in: body
+          description: Value of the sort field of the last item on the page
+          required: true
+          schema:
+            type: string
+        - name: item_id
+          in: body
+          description: ID of the last item on the page
+          required: true
+          schema:
+            type: integer
+    responses:
+        200:
+            description: Returns the url-safe cursor string.
+    """
+    if isinstance(value, datetime.datetime):
+        value = {"datetime": value.isoformat()}
+    raw = json.dumps([key, value, item_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str, key: str, parse_value: Callable[[Any], Any]) -> tuple[Any, int]:
+    """
+    Decode Cursor
+    ---
+    description: Unpacks a cursor produced by encode_cursor back into its (sort value, id) keyset.
+    parameters:
+        - name: cursor
+          in: query
+          description: Opaque cursor returned with the previous page
+          required: true
+          schema:
+            type: string
+        - name: key
+          in: query
+          description: Name of the order of the requested page, must match the cursor
+          required: true
+          schema:
+            type: string
+        - name: parse_value
+          in: body
+          description: Checks the sort value and converts it to the type of its column, raising
+            ValueError, TypeError or KeyError if it does not fit, e.g. a SORT_VALUE_PARSERS entry
+          required: true
+          schema:
+            type: object
+    responses:
+        200:
+            description: Returns the (sort value, id) tuple.
+        400:
+            description: Cursor is malformed, was issued for another order or holds values of the wrong type.
+    """
+    try:
+        cursor_key, value, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if cursor_key != key:
+            raise ValueError(cursor_key)
+        return parse_value(value), _integer(item_id)
+    except (ValueError, TypeError, KeyError):
+        raise exceptions.BadDataFormat(detail="Invalid cursor!")
@@ -0,0 +1,81 @@
+from typing import Mapping, Sequence
+
+from fastapi.responses import ORJSONResponse
+
+from .schemas import Item, ItemRowsPage, ItemRowsCursorPage
+
+
+def items_page_response(
+        page: ItemRowsPage | ItemRowsCursorPage,
+        headers: Mapping[str, str] | None = None,
+        fields: Sequence[str] | None = None,
+) -> ORJSONResponse:
+    """
+    Items Page Response
+    ---
+    description: Serializes a page of item rows straight to JSON with orjson.
+        The rows already have the shape of the Item schema, so they are neither turned into
+        Pydantic models nor validated again against the route response_model.
+    parameters:
+        - name: page
+          in: body
+          description: Page returned by crud.get_items or crud.get_items_by_cursor
+          required: true
+          schema:
+            type: object
+        - name: headers
+          in: header
+          description: Extra response headers, e.g. ETag
+          required: false
+          schema:
+            type: object
+        - name: fields
+          in: query
+          description: Sparse fieldset, the rows may hold more columns than were requested
+          required: false
+          schema:
+            type: array
+    responses:
+        200:
+            description: Returns the JSON response.
+    """
+    if fields is None:
+        items = [row._asdict() for row in page["items"]]
+    else:
+        items = [{field: getattr(row, field) for field in fields} for row in page["items"]]
+    return ORJSONResponse(content={**page, "items": items}, headers=headers)
+
+
+def item_response(
+        item: Item,
+        fields: Sequence[str],
+        headers: Mapping[str, str] | None = None,
+) -> ORJSONResponse:
+    """
+    Item Response
+    ---
+    description: Serializes the requested fields of a single item, cached or fetched as a row.
+    parameters:
+        - name: item
+          in: body
+          description: Item schema or row with at least the requested fields
+          required: true
+          schema:
+            $ref: '#/components/schemas/Item'
+        - name: fields
+          in: query
+          description: Sparse fieldset
+          required: true
+          schema:
+            type: array
+        - name: headers
+          in: header
+          description: Extra response headers, e.g. ETag
+          required: false
+          schema:
+            type: object
+    responses:
+        200:
+            description: Returns the JSON response.
+    """
+    return ORJSONResponse(content={field: getattr(item, field) for field in fields}, headers=headers)
@@ -1,7 +1,8 @@
 import datetime
 
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from sqlalchemy import Row
+from typing import Optional, Literal, Sequence, TypedDict
 
 from app.core.models.item import ItemCategory
 
@@ -36,6 +37,98 @@ class Item(ItemBase):
     quantity: int
     price: float
     created_at: datetime.datetime
+    version: int
+
+
+ItemSortField = Literal["created_at", "name", "price", "quantity"]
+
+ItemTotalMode = Literal["exact", "cached", "estimated", "none"]
+
+
+class ItemFilter(BaseModel):
+    category: Optional[ItemCategory] = None
+    min_price: Optional[float] = Field(None, ge=0)
+    max_price: Optional[float] = Field(None, ge=0)
+    min_quantity: Optional[int] = None
+    max_quantity: Optional[int] = None
+    created_from: Optional[datetime.datetime] = None
+    created_to: Optional[datetime.datetime] = None
+
+    @field_validator("created_from", "created_to")
+    @classmethod
+    def naive_utc(cls, value: Optional[datetime.datetime]) -> Optional[datetime.datetime]:
+        # created_at is a timestamp without time zone holding UTC.
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        return value
+
+
+class ItemSort(BaseModel):
+    sort_by: ItemSortField = "created_at"
+    order: Literal["asc", "desc"] = "desc"
+
+
+class ItemCursorPage(BaseModel):
+    items: list[Item]
+    size: int
+    next_cursor: Optional[str] = None
+
+
+class ItemRowsPage(TypedDict):
+    """Body of Page[Item] with items still as rows, see responses.items_page_response."""
+    items: Sequence[Row]
+    total: Optional[int]
+    page: int
+    size: int
+    pages: Optional[int]
+
+
+class ItemRowsCursorPage(TypedDict):
+    """Body of ItemCursorPage with items still as rows, see responses.items_page_response."""
+    items: Sequence[Row]
+    size: int
+    next_cursor: Optional[str]
+
+
+class ItemQuantityAdjust(BaseModel):
+    delta: int
+    prevent_negative: bool = False
+
+
+class ItemQuantity(BaseModel):
+    id: int
+    quantity: int
+
+
+class ItemCategoryStats(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    category: ItemCategory
+    item_count: int = 0
+    total_quantity: int = 0
+    total_value: float = 0
+    out_of_stock: int = 0
+
+
+class ItemStats(BaseModel):
+    categories: list[ItemCategoryStats]
+    item_count: int
+    total_quantity: int
+    total_value: float
+    out_of_stock: int
+
+
+class ItemBulkRowResult(BaseModel):
+    index: int
+    status: Literal["created", "conflict"]
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class ItemBulkCreateResult(BaseModel):
+    created: int
+    conflicts: int
+    results: list[ItemBulkRowResult]
 
 
 class UserRead(BaseModel):
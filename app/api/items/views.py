@@ -1,12 +1,28 @@
-from typing import Annotated
+from typing import Annotated, Sequence
 
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Query, Request, Response, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi_pagination import Page
 
-from . import crud
-from .dependencies import item_by_id
-from .schemas import Item, ItemCreate, ItemUpdate, UserRead
+from . import crud, export
+from .responses import items_page_response, item_response
+from .etag import item_etag, items_etag, etag_matches, if_match_versions
+from .dependencies import read_item_by_id, item_fields, item_filters, bulk_items_in, NDJSON_MEDIA_TYPE
+from .schemas import (
+    Item,
+    ItemCreate,
+    ItemUpdate,
+    ItemCursorPage,
+    ItemFilter,
+    ItemSort,
+    ItemTotalMode,
+    ItemStats,
+    ItemBulkCreateResult,
+    ItemQuantityAdjust,
+    ItemQuantity,
+    UserRead,
+)
 from app.core.models import db_helper
 from app.api.auth.helpers import get_current_user
 from app import exceptions
@@ -14,19 +30,95 @@ from app import exceptions
 router = APIRouter(tags=["Items"])
 
 
+async def write_failed(session: AsyncSession, item_id: int, expected_versions: list[int] | None):
+    """
+    Write Failed
+    ---
+    description: Tells apart why an update or delete matched no row, looking the item up on the
+        primary without item_cache. Runs in the transaction of the failed write, which the crud
+        functions leave uncommitted and which is rolled back when the request session closes.
+    responses:
+        404:
+            description: Item does not exist.
+        412:
+            description: Item exists but If-Match named another version of it.
+    """
+    if expected_versions is None or not await crud.item_exists(session=session, item_id=item_id):
+        return exceptions.ContentNotFound(detail=f"Item {item_id} not found!")
+    return exceptions.PreconditionFailed(detail=f"Item {item_id} was modified!")
+
+
 @router.get("", response_model=Page[Item], summary="Retrieve a list of items")
 async def get_items(
         current_user: Annotated[UserRead, Depends(get_current_user)],
-        session: AsyncSession = Depends(db_helper.scoped_session_dependency),
+        filters: Annotated[ItemFilter, Depends(item_filters)],
+        sort: Annotated[ItemSort, Depends()],
+        fields: Annotated[Sequence[str] | None, Depends(item_fields)],
+        total_mode: ItemTotalMode | None = None,
+        if_none_match: Annotated[str | None, Header()] = None,
+        session: AsyncSession = Depends(db_helper.read_session_dependency),
 ):
     """
     Retrieve a list of items.
 
+    Items can be filtered by `category`, price, quantity and creation date ranges and sorted
+    by `sort_by` (created_at, name, price, quantity) in either `order`.
+    `total_mode` picks how `total` is computed: `exact` counts every time, `cached` reuses a
+    recent count, `estimated` uses the planner row estimate and `none` leaves `total` and
+    `pages` empty. Defaults to the server setting.
+    `fields`, e.g. `id,name,quantity`, limits the returned and selected item fields.
+    Responds 304 if the page still matches the ETag sent in `If-None-Match`.
+
+    - **Permissions:** Requires read-only or full access permission.
+    """
+    if current_user.permission.value not in ("read_only", "full_access"):
+        raise exceptions.Unauthorized(detail="You don't have permissions!")
+    page = await crud.get_items(
+        session=session,
+        filters=filters,
+        sort=sort,
+        total_mode=total_mode,
+        fields=fields,
+    )
+    etag = items_etag(page["items"], total=page["total"], page=page["page"], size=page["size"], fields=fields)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return items_page_response(page, headers={"ETag": etag}, fields=fields)
+
+
+@router.get("/cursor", response_model=ItemCursorPage, summary="Retrieve a list of items using a cursor")
+async def get_items_by_cursor(
+        current_user: Annotated[UserRead, Depends(get_current_user)],
+        filters: Annotated[ItemFilter, Depends(item_filters)],
+        sort: Annotated[ItemSort, Depends()],
+        cursor: str | None = None,
+        size: Annotated[int, Query(ge=1, le=100)] = 50,
+        if_none_match: Annotated[str | None, Header()] = None,
+        session: AsyncSession = Depends(db_helper.read_session_dependency),
+):
+    """
+    Retrieve a list of items using keyset pagination.
+
+    Pass `next_cursor` from the previous response as `cursor` to get the next page,
+    keeping the same filters and sort. Unlike the page-number listing, every page costs
+    the same regardless of depth. Responds 304 if the page still matches the ETag sent in
+    `If-None-Match`.
+
     - **Permissions:** Requires read-only or full access permission.
     """
     if current_user.permission.value not in ("read_only", "full_access"):
         raise exceptions.Unauthorized(detail="You don't have permissions!")
-    return await crud.get_items(session=session)
+    page = await crud.get_items_by_cursor(
+        session=session,
+        cursor=cursor,
+        size=size,
+        filters=filters,
+        sort=sort,
+    )
+    etag = items_etag(page["items"], size=page["size"], next_cursor=page["next_cursor"])
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return items_page_response(page, headers={"ETag": etag})
 
 
 @router.post(
@@ -38,7 +130,7 @@ async def get_items(
 async def create_item(
         item_in: ItemCreate,
         current_user: Annotated[UserRead, Depends(get_current_user)],
-        session: AsyncSession = Depends(db_helper.scoped_session_dependency),
+        session: AsyncSession = Depends(db_helper.session_dependency),
 ):
     """
     Create a new item.
@@ -50,53 +142,259 @@ async def create_item(
     return await crud.create_item(session=session, item_in=item_in)
 
 
+@router.get("/search", response_model=ItemCursorPage, summary="Search items by name and description")
+async def search_items(
+        current_user: Annotated[UserRead, Depends(get_current_user)],
+        q: Annotated[str, Query(min_length=1, max_length=200)],
+        filters: Annotated[ItemFilter, Depends(item_filters)],
+        cursor: str | None = None,
+        size: Annotated[int, Query(ge=1, le=100)] = 50,
+        session: AsyncSession = Depends(db_helper.read_session_dependency),
+):
+    """
+    Search items by name and description, best matches first.
+
+    Combines full-text search (`"mantis blades"`, `-katana` web search syntax) with fuzzy
+    matching, so small typos still find the item. Pass `next_cursor` as `cursor` with the
+    same `q` to get the next page. Paging stops after the best `ITEM_SEARCH_MAX_RESULTS`
+    matches, narrow the query or the filters to find items beyond them.
+
+    - **Permissions:** Requires read-only or full access permission.
+    """
+    if current_user.permission.value not in ("read_only", "full_access"):
+        raise exceptions.Unauthorized(detail="You don't have permissions!")
+    return await crud.search_items(
+        session=session,
+        q=q,
+        cursor=cursor,
+        size=size,
+        filters=filters,
+    )
+
+
+@router.get("/stats", response_model=ItemStats, summary="Retrieve inventory statistics per category")
+async def get_item_stats(
+        current_user: Annotated[UserRead, Depends(get_current_user)],
+        session: AsyncSession = Depends(db_helper.read_session_dependency),
+):
+    """
+    Retrieve inventory statistics per category.
+
+    Returns the item count, total quantity, total stock value (`quantity * price`) and
+    number of out of stock items of every category, and their sums. The totals are kept
+    up to date on every write, so the cost does not grow with the catalog.
+
+    - **Permissions:** Requires read-only or full access permission.
+    """
+    if current_user.permission.value not in ("read_only", "full_access"):
+        raise exceptions.Unauthorized(detail="You don't have permissions!")
+    return await crud.get_item_stats(session=session)
+
+
+@router.get("/export", response_class=StreamingResponse, summary="Export all items as NDJSON or CSV")
+async def export_items(
+        request: Request,
+        current_user: Annotated[UserRead, Depends(get_current_user)],
+        filters: Annotated[ItemFilter, Depends(item_filters)],
+        fields: Annotated[Sequence[str] | None, Depends(item_fields)],
+        export_format: Annotated[export.ExportFormat, Query(alias="format")] = "ndjson",
+):
+    """
+    Export all items as NDJSON or CSV.
+
+    Items are streamed from a server-side cursor, newest first, so the export can be
+    downloaded in one request regardless of the catalog size.
+    Accepts the same filters as the item list, e.g. `category`, `created_from` (inclusive)
+    and `created_to` (exclusive). `fields`, e.g. `id,name,quantity`, limits the exported columns.
+
+    - **Permissions:** Requires read-only or full access permission.
+    """
+    if current_user.permission.value not in ("read_only", "full_access"):
+        raise exceptions.Unauthorized(detail="You don't have permissions!")
+    client_key = db_helper.client_key(request.headers.get("Authorization"))
+    return StreamingResponse(
+        export.export_items(
+            session_factory=db_helper.read_session_factory(client_key),
+            export_format=export_format,
+            filters=filters,
+            fields=fields,
+        ),
+        media_type=export.MEDIA_TYPES[export_format],
+    )
+
+
+@router.post(
+    "/bulk",
+    response_model=ItemBulkCreateResult,
+    summary="Create many items in one transaction",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/ItemCreate"}}
+                },
+                NDJSON_MEDIA_TYPE: {"schema": {"$ref": "#/components/schemas/ItemCreate"}},
+            },
+        }
+    },
+)
+async def create_items_bulk(
+        current_user: Annotated[UserRead, Depends(get_current_user)],
+        items_in: list[ItemCreate] = Depends(bulk_items_in),
+        session: AsyncSession = Depends(db_helper.session_dependency),
+):
+    """
+    Create many items in one transaction.
+
+    The body is either a JSON array of items or NDJSON (`application/x-ndjson`, one item per line).
+    The response holds a result per row in request order; rows whose name already exists
+    are reported as `conflict` and the rest are still created.
+
+    - **Permissions:** Requires full access permission.
+    """
+    if current_user.permission.value != "full_access":
+        raise exceptions.Unauthorized(detail="You don't have permissions!")
+    return await crud.create_items_bulk(session=session, items_in=items_in)
+
+
 @router.get("/{item_id}", response_model=Item, summary="Retrieve details of a specific item by its ID")
 async def get_item(
+        response: Response,
         current_user: Annotated[UserRead, Depends(get_current_user)],
-        item: Item = Depends(item_by_id),
+        fields: Annotated[Sequence[str] | None, Depends(item_fields)],
+        if_none_match: Annotated[str | None, Header()] = None,
+        item: Item = Depends(read_item_by_id),
 ) -> Item:
     """
     Retrieve details of a specific item by its ID.
 
+    `fields`, e.g. `id,name,quantity`, limits the returned and selected item fields.
+    The `ETag` of the response can be sent back in `If-None-Match` to get a 304 while the
+    item is unchanged, or in `If-Match` to update or delete it only if it is unchanged.
+
     - **Permissions:** Requires read-only or full access permission.
     """
     if current_user.permission.value not in ("read_only", "full_access"):
         raise exceptions.Unauthorized(detail="You don't have permissions!")
+    etag = item_etag(item)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    if fields is not None:
+        return item_response(item, fields, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return item
 
 
-@router.put("/{item_id}", summary="Update details of a specific item by its ID")
+@router.put("/{item_id}", response_model=Item, summary="Update details of a specific item by its ID")
 async def update_item(
+        item_id: int,
+        response: Response,
         current_user: Annotated[UserRead, Depends(get_current_user)],
         item_update: ItemUpdate,
-        item: Item = Depends(item_by_id),
-        session: AsyncSession = Depends(db_helper.scoped_session_dependency),
+        if_match: Annotated[str | None, Header()] = None,
+        session: AsyncSession = Depends(db_helper.session_dependency),
 ):
     """
     Update details of a specific item by its ID.
 
+    With `If-Match` the update only happens if the item still has that ETag, otherwise 412.
+
     - **Permissions:** Requires full access permission.
     """
     if current_user.permission.value != "full_access":
         raise exceptions.Unauthorized(detail="You don't have permissions!")
-    return await crud.update_item(
+    expected_versions = if_match_versions(if_match, item_id)
+    item = await crud.update_item(
         session=session,
-        item=item,
+        item_id=item_id,
         item_update=item_update,
+        expected_versions=expected_versions,
     )
+    if item is None:
+        raise await write_failed(session, item_id, expected_versions)
+    response.headers["ETag"] = item_etag(item)
+    return item
+
+
+@router.patch("/{item_id}", response_model=Item, summary="Partially update a specific item by its ID")
+async def update_item_partial(
+        item_id: int,
+        response: Response,
+        current_user: Annotated[UserRead, Depends(get_current_user)],
+        item_update: ItemUpdate,
+        if_match: Annotated[str | None, Header()] = None,
+        session: AsyncSession = Depends(db_helper.session_dependency),
+):
+    """
+    Partially update a specific item by its ID, only the fields present in the body are changed.
+
+    With `If-Match` the update only happens if the item still has that ETag, otherwise 412.
+
+    - **Permissions:** Requires full access permission.
+    """
+    if current_user.permission.value != "full_access":
+        raise exceptions.Unauthorized(detail="You don't have permissions!")
+    expected_versions = if_match_versions(if_match, item_id)
+    item = await crud.update_item(
+        session=session,
+        item_id=item_id,
+        item_update=item_update,
+        partial=True,
+        expected_versions=expected_versions,
+    )
+    if item is None:
+        raise await write_failed(session, item_id, expected_versions)
+    response.headers["ETag"] = item_etag(item)
+    return item
+
+
+@router.post("/{item_id}/adjust", response_model=ItemQuantity, summary="Atomically adjust the quantity of an item")
+async def adjust_item_quantity(
+        item_id: int,
+        adjustment: ItemQuantityAdjust,
+        current_user: Annotated[UserRead, Depends(get_current_user)],
+        session: AsyncSession = Depends(db_helper.session_dependency),
+):
+    """
+    Atomically add a signed `delta` to the quantity of an item and return the new quantity.
+
+    Safe under concurrent use: no adjustment is lost. With `prevent_negative` the change is
+    rejected with 409 instead of taking the quantity below zero.
+
+    - **Permissions:** Requires full access permission.
+    """
+    if current_user.permission.value != "full_access":
+        raise exceptions.Unauthorized(detail="You don't have permissions!")
+    quantity = await crud.adjust_item_quantity(
+        session=session,
+        item_id=item_id,
+        delta=adjustment.delta,
+        prevent_negative=adjustment.prevent_negative,
+    )
+    if quantity is not None:
+        return ItemQuantity(id=item_id, quantity=quantity)
+    if not await crud.item_exists(session=session, item_id=item_id):
+        raise exceptions.ContentNotFound(detail=f"Item {item_id} not found!")
+    raise exceptions.Conflict(detail=f"Not enough stock of item {item_id}!")
 
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete a specific item by its ID")
 async def delete_item(
+        item_id: int,
         current_user: Annotated[UserRead, Depends(get_current_user)],
-        item: Item = Depends(item_by_id),
-        session: AsyncSession = Depends(db_helper.scoped_session_dependency),
+        if_match: Annotated[str | None, Header()] = None,
+        session: AsyncSession = Depends(db_helper.session_dependency),
 ) -> None:
     """
     Delete a specific item by its ID.
 
+    With `If-Match` the item is only deleted if it still has that ETag, otherwise 412.
+
     - **Permissions:** Requires full access permission.
     """
     if current_user.permission.value != "full_access":
         raise exceptions.Unauthorized(detail="You don't have permissions!")
-    await crud.delete_item(session=session, item=item)
+    expected_versions = if_match_versions(if_match, item_id)
+    if not await crud.delete_item(session=session, item_id=item_id, expected_versions=expected_versions):
+        raise await write_failed(session, item_id, expected_versions)
@@ -0,0 +1,32 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+
+from app.core.models import db_helper
+from app.api.auth.helpers import get_current_user, user_cache
+from app.api.auth.rate_limit import rate_limit_stats
+from app.api.items.crud import item_cache
+from app.api.items.schemas import UserRead
+from app import exceptions
+
+router_system = APIRouter(tags=["System"])
+
+
+@router_system.get("/stats", summary="Retrieve connection pool, cache and rate limit statistics")
+async def get_stats(
+        current_user: Annotated[UserRead, Depends(get_current_user)],
+):
+    """
+    Retrieve live connection pool state, checkout wait times, cache counters and login rate limit counters.
+
+    - **Permissions:** Requires full access permission.
+    """
+    if current_user.permission.value != "full_access":
+        raise exceptions.Unauthorized(detail="You don't have permissions!")
+    return {
+        "db_pool": db_helper.pool_status(),
+        "db_replica_pools": [db_helper.pool_status(engine) for engine in db_helper.replica_engines],
+        "user_cache": user_cache.stats(),
+        "item_cache": item_cache.stats(),
+        "auth_rate_limit": rate_limit_stats(),
+    }
@@ -0,0 +1,199 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class TTLCache:
+    """
+    TTL Cache Class
+    ---
+    description: Bounded in-process LRU cache whose entries expire after a fixed time to live.
+        Keeps hit, miss and eviction counters so the saved lookups can be observed.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Constructor method to initialize the TTLCache class.
+        ---
+        description: Initializes an empty cache with the provided size bound and time to live.
+        parameters:
+            - name: maxsize
+              in: body
+              description: Maximum number of entries, the least recently used one is evicted first
+              required: true
+              schema:
+                type: integer
+            - name: ttl
+              in: body
+              description: Time to live of an entry in seconds
+              required: true
+              schema:
+                type: number
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        """
+        Get
+        ---
+        description: Returns the cached value and marks it as recently used.
+        responses:
+            200:
+                description: Returns the value, or None if it is missing or expired.
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Set
+        ---
+        description: Stores the value, evicting the least recently used entries over maxsize.
+        """
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """
+        Delete
+        ---
+        description: Drops the entry if it is cached.
+        """
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Clear
+        ---
+        description: Drops every entry, the counters are kept.
+        """
+        self._data.clear()
+
+    def stats(self) -> dict:
+        """
+        Stats
+        ---
+        description: Reports the size of the cache and its counters.
+        responses:
+            200:
+                description: Returns size, maxsize, hits, misses and evictions.
+        """
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class CacheBackend(ABC):
+    """
+    Cache Backend Class
+    ---
+    description: Interface of a pluggable cache. Methods are coroutines so that a shared backend
+        living in another process can implement it; such a backend serializes the values itself.
+    """
+    @abstractmethod
+    async def get(self, key: Hashable) -> Any | None:
+        ...
+
+    @abstractmethod
+    async def set(self, key: Hashable, value: Any) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: Hashable) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Memory Cache Backend Class
+    ---
+    description: In-process CacheBackend on top of TTLCache. Every worker process has its own copy,
+        so a write seen by one worker reaches the others only when their entry expires.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: Hashable) -> Any | None:
+        return self._cache.get(key)
+
+    async def set(self, key: Hashable, value: Any) -> None:
+        self._cache.set(key, value)
+
+    async def delete(self, key: Hashable) -> None:
+        self._cache.delete(key)
+
+    async def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+CACHE_BACKENDS: dict[str, type[CacheBackend]] = {
+    "memory": MemoryCacheBackend,
+}
+
+
+def create_cache(backend: str, maxsize: int, ttl: float) -> CacheBackend:
+    """
+    Create Cache
+    ---
+    description: Builds the cache backend registered under the given name.
+    parameters:
+        - name: backend
+          in: body
+          description: Name of the backend, one of CACHE_BACKENDS
+          required: true
+          schema:
+            type: string
+        - name: maxsize
+          in: body
+          description: Maximum number of entries
+          required: true
+          schema:
+            type: integer
+        - name: ttl
+          in: body
+          description: Time to live of an entry in seconds
+          required: true
+          schema:
+            type: number
+    responses:
+        200:
+            description: Returns the cache backend.
+    """
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(f"Unknown cache backend {backend!r}, expected one of {sorted(CACHE_BACKENDS)}")
+    return CACHE_BACKENDS[backend](maxsize=maxsize, ttl=ttl)
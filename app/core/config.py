@@ -1,4 +1,6 @@
 import os
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -13,8 +15,49 @@ class Config(BaseSettings):
 
     SQLALCHEMY_DATABASE_URL: str = f'postgresql+asyncpg://{DB_USER}:{DB_PW}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
     db_echo: bool = False
+    db_init_schema_on_startup: bool = True
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    # A ping is an extra round trip on every checkout, i.e. on every request; db_pool_recycle
+    # already replaces connections before the server or a proxy drops them.
+    db_pool_pre_ping: bool = False
+    db_statement_cache_size: int = 100
+    db_replica_urls: list[str] = []
+    db_replica_sticky_seconds: float = 5
+    db_slow_query_seconds: float | None = 0.5
+    db_slow_query_log: str | None = None
+    db_slow_query_explain_rate: float = 0.0
+
+    bulk_create_max_items: int = 100_000
+    item_cache_backend: str = "memory"
+    item_cache_size: int = 10_000
+    item_cache_ttl_seconds: float = 10
+    items_total_mode: Literal["exact", "cached", "estimated", "none"] = "exact"
+    items_total_cache_ttl_seconds: float = 30
+    item_search_max_results: int = 1000
 
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    REFRESH_TOKEN_PURGE_SECONDS: float = 3600
+    REFRESH_TOKEN_PURGE_BATCH_SIZE: int = 1000
+    STATELESS_AUTH: bool = False
+    TOKEN_DENYLIST_REFRESH_SECONDS: float = 5
+    PASSWORD_HASH_SCHEME: str = "bcrypt"
+    PASSWORD_HASH_ROUNDS: int | None = None
+    PASSWORD_HASH_DEPRECATED_SCHEMES: list[str] = []
+    PASSWORD_HASH_WORKERS: int = min(4, os.cpu_count() or 1)
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 5
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+    AUTH_RATE_LIMIT_ENABLED: bool = True
+    AUTH_USERNAME_RATE_PER_MINUTE: float = 10
+    AUTH_USERNAME_BURST: int = 10
+    AUTH_IP_RATE_PER_MINUTE: float = 60
+    AUTH_IP_BURST: int = 30
+    AUTH_RATE_LIMIT_KEYS: int = 100_000
+    USER_CACHE_SIZE: int = 1024
+    USER_CACHE_TTL_SECONDS: int = 60
     SECRET_KEY: str = os.environ.get("SECRET_KEY")
     ALGORITHM: str = os.environ.get("ALGORITHM")
 
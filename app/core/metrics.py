@@ -0,0 +1,164 @@
+import os
+import time
+from contextvars import ContextVar
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time until the response headers are ready, per route template",
+    ["method", "route"],
+)
+REQUESTS = Counter(
+    "http_requests_total",
+    "Finished requests per route template and status code",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "Statements executed while handling one request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_query_seconds_per_request",
+    "Time spent executing statements while handling one request",
+    ["route"],
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "Time to execute one statement",
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Connection checkouts that gave up after pool_timeout",
+)
+
+
+class RequestContext:
+    """
+    Request Context Class
+    ---
+    description: Per-request accumulator the engine hooks add executed statements to.
+        Holds the ASGI scope so the route template is known once routing has happened.
+    """
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.queries = 0
+        self.query_time = 0.0
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return route.path if route is not None else "unmatched"
+
+
+request_context: ContextVar[RequestContext | None] = ContextVar("request_context", default=None)
+
+
+def observe_request(method: str, context: RequestContext, status_code: int, duration: float) -> None:
+    """
+    Observe Request
+    ---
+    description: Records a finished request and the statements it executed.
+    parameters:
+        - name: method
+          in: body
+          description: HTTP method of the request
+          required: true
+          schema:
+            type: string
+        - name: context
+          in: body
+          description: Context of the request
+          required: true
+          schema:
+            type: object
+        - name: status_code
+          in: body
+          description: Status code of the response, 500 if the app raised
+          required: true
+          schema:
+            type: integer
+        - name: duration
+          in: body
+          description: Seconds until the response headers were ready
+          required: true
+          schema:
+            type: number
+    """
+    route = context.route
+    REQUEST_LATENCY.labels(method, route).observe(duration)
+    REQUESTS.labels(method, route, str(status_code)).inc()
+    DB_QUERIES_PER_REQUEST.labels(route).observe(context.queries)
+    DB_TIME_PER_REQUEST.labels(route).observe(context.query_time)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Instrument Engine
+    ---
+    description: Times every statement executed through the engine and adds it to the
+        context of the current request, if any.
+    parameters:
+        - name: engine
+          in: body
+          description: Engine to instrument
+          required: true
+          schema:
+            type: object
+    """
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - context._metrics_started_at
+    DB_QUERY_LATENCY.observe(duration)
+    current = request_context.get()
+    if current is not None:
+        current.queries += 1
+        current.query_time += duration
+
+
+def render_metrics() -> bytes:
+    """
+    Render Metrics
+    ---
+    description: Renders all metrics in the Prometheus text format. When the app runs in
+        several worker processes with PROMETHEUS_MULTIPROC_DIR set, the values of all
+        workers are aggregated.
+    responses:
+        200:
+            description: Returns the exposition text.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
@@ -3,10 +3,31 @@ __all__ = (
     "DatabaseHelper",
     "db_helper",
     "Item",
+    "ITEM_INDEX_DDL",
+    "ITEM_SCHEMA_DDL",
+    "ItemCategoryStats",
+    "ITEM_STATS_BACKFILL_DDL",
+    "ITEM_STATS_FUNCTION_DDL",
+    "ITEM_STATS_SHARDS",
+    "ITEM_STATS_TRIGGER_DDL",
+    "init_schema",
+    "RefreshToken",
+    "REFRESH_TOKEN_INDEX_DDL",
+    "TokenRevocation",
     "User",
 )
 
 from .base import Base
 from .db_helper import DatabaseHelper, db_helper
-from .item import Item
+from .item import Item, ITEM_INDEX_DDL, ITEM_SCHEMA_DDL
+from .item_stats import (
+    ItemCategoryStats,
+    ITEM_STATS_BACKFILL_DDL,
+    ITEM_STATS_FUNCTION_DDL,
+    ITEM_STATS_SHARDS,
+    ITEM_STATS_TRIGGER_DDL,
+)
+from .schema import init_schema
+from .refresh_token import RefreshToken, REFRESH_TOKEN_INDEX_DDL
+from .token_revocation import TokenRevocation
 from .user import User
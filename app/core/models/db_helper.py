@@ -1,13 +1,50 @@
-from asyncio import current_task
+import time
+from contextlib import asynccontextmanager
+from itertools import cycle
+from typing import AsyncIterator, Sequence
 
+from fastapi import Request
+from jose import JWTError, jwt
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     create_async_engine,
     async_sessionmaker,
-    async_scoped_session,
 )
 
 from app.core.config import config
+from app.core.cache import TTLCache
+from app.core.metrics import DB_POOL_WAIT, DB_POOL_TIMEOUTS
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Timed Async Queue Pool Class
+    ---
+    description: AsyncAdaptedQueuePool that records how long callers wait to check out a connection.
+    """
+    checkouts: int = 0
+    checkout_timeouts: int = 0
+    checkout_wait_total: float = 0.0
+    checkout_wait_max: float = 0.0
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.checkout_timeouts += 1
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        waited = time.perf_counter() - started
+        DB_POOL_WAIT.observe(waited)
+        self.checkouts += 1
+        self.checkout_wait_total += waited
+        self.checkout_wait_max = max(self.checkout_wait_max, waited)
+        return connection
 
 
 class DatabaseHelper:
@@ -16,11 +53,23 @@ class DatabaseHelper:
     ---
     description: Provides utility functions for managing database sessions.
     """
-    def __init__(self, url: str, echo: bool = False):
+    def __init__(
+            self,
+            url: str,
+            echo: bool = False,
+            pool_size: int = 5,
+            max_overflow: int = 10,
+            pool_timeout: float = 30,
+            pool_recycle: int = -1,
+            pool_pre_ping: bool = False,
+            statement_cache_size: int = 100,
+            replica_urls: Sequence[str] = (),
+            replica_sticky_seconds: float = 5,
+    ):
         """
         Constructor method to initialize the DatabaseHelper class.
         ---
-        description: Initializes the DatabaseHelper with the provided database URL and echo setting.
+        description: Initializes the DatabaseHelper with the provided database URL, echo and pool settings.
         parameters:
             - name: url
               in: body
@@ -34,61 +83,281 @@ class DatabaseHelper:
               required: false
               schema:
                 type: boolean
+            - name: pool_size
+              in: body
+              description: Number of connections kept open in the pool
+              required: false
+              schema:
+                type: integer
+            - name: max_overflow
+              in: body
+              description: Number of connections allowed on top of pool_size under load
+              required: false
+              schema:
+                type: integer
+            - name: pool_timeout
+              in: body
+              description: Seconds to wait for a free connection before failing
+              required: false
+              schema:
+                type: number
+            - name: pool_recycle
+              in: body
+              description: Seconds after which a connection is replaced, -1 to never recycle
+              required: false
+              schema:
+                type: integer
+            - name: pool_pre_ping
+              in: body
+              description: Test connections for liveness on checkout, at the cost of a round trip per checkout
+              required: false
+              schema:
+                type: boolean
+            - name: statement_cache_size
+              in: body
+              description: Size of the asyncpg prepared statement cache per connection, 0 disables it
+              required: false
+              schema:
+                type: integer
+            - name: replica_urls
+              in: body
+              description: URLs of read replicas, read-only routes are spread over them round robin
+              required: false
+              schema:
+                type: array
+            - name: replica_sticky_seconds
+              in: body
+              description: Seconds a client keeps reading from the primary after it wrote something
+              required: false
+              schema:
+                type: number
         """
-        self.engine = create_async_engine(
-            url=url,
+        engine_options = dict(
             echo=echo,
+            poolclass=TimedAsyncQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=pool_pre_ping,
+            connect_args={
+                "statement_cache_size": statement_cache_size,
+                "prepared_statement_cache_size": statement_cache_size,
+            },
+        )
+        self.engine = create_async_engine(url=url, **engine_options)
+        self.session_factory = self._make_session_factory(self.engine)
+
+        self.replica_engines = [
+            create_async_engine(url=replica_url, **engine_options)
+            for replica_url in replica_urls
+        ]
+        self._replica_session_factories = cycle(
+            [self._make_session_factory(engine) for engine in self.replica_engines]
         )
-        self.session_factory = async_sessionmaker(
-            bind=self.engine,
+        self.recent_writers = TTLCache(maxsize=10_000, ttl=replica_sticky_seconds)
+
+    @staticmethod
+    def _make_session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+        return async_sessionmaker(
+            bind=engine,
             autoflush=False,
             autocommit=False,
             expire_on_commit=False,
         )
 
-    def get_scoped_session(self):
+    @staticmethod
+    def client_key(authorization: str | None) -> str | None:
         """
-        Get Scoped Session
+        Client Key
         ---
-        description: Creates a new scoped database session.
+        description: Identifies the client of a request for replica stickiness by the subject of its
+            bearer token, so a client that switches to a refreshed token still reads its own writes.
+            The token is not verified here, a forged one can only move reads of its subject to the primary.
+        parameters:
+            - name: authorization
+              in: header
+              description: Authorization header of the request
+              required: false
+              schema:
+                type: string
         responses:
             200:
-                description: Returns a new scoped database session.
+                description: Returns the token subject, or None without a readable bearer token.
         """
-        session = async_scoped_session(
-            session_factory=self.session_factory,
-            scopefunc=current_task,
-        )
-        return session
+        scheme, _, token = (authorization or "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        try:
+            return jwt.get_unverified_claims(token).get("sub")
+        except JWTError:
+            return None
 
-    async def session_dependency(self) -> AsyncSession:
+    def mark_writer(self, client_key: str | None) -> None:
+        """
+        Mark Writer
+        ---
+        description: Remembers that a client has just written, so its reads stay on the primary
+            for replica_sticky_seconds and it always sees its own writes.
+        parameters:
+            - name: client_key
+              in: header
+              description: Key identifying the client, see client_key
+              required: true
+              schema:
+                type: string
+        """
+        if self.replica_engines and client_key:
+            self.recent_writers.set(client_key, True)
+
+    def read_session_factory(self, client_key: str | None = None) -> async_sessionmaker[AsyncSession]:
+        """
+        Read Session Factory
+        ---
+        description: Picks the session factory for a read-only unit of work.
+            Returns the next replica in round robin order, or the primary when there are no
+            replicas or the client wrote within the last replica_sticky_seconds.
+        parameters:
+            - name: client_key
+              in: header
+              description: Key identifying the client, see client_key
+              required: false
+              schema:
+                type: string
+        responses:
+            200:
+                description: Returns an async session factory.
+        """
+        if not self.replica_engines:
+            return self.session_factory
+        if client_key and self.recent_writers.get(client_key):
+            return self.session_factory
+        return next(self._replica_session_factories)
+
+    def is_primary(self, session: AsyncSession) -> bool:
+        """
+        Is Primary
+        ---
+        description: Tells whether a session reads from the primary rather than from a replica,
+            whose data may lag behind the latest writes.
+        responses:
+            200:
+                description: Returns True for sessions bound to the primary engine.
+        """
+        return session.bind is self.engine
+
+    def pool_status(self, engine: AsyncEngine | None = None) -> dict:
+        """
+        Pool Status
+        ---
+        description: Reports the live state of a connection pool and its checkout wait times.
+        parameters:
+            - name: engine
+              in: body
+              description: Engine whose pool to report, the primary one by default
+              required: false
+              schema:
+                type: object
+        responses:
+            200:
+                description: Returns pool size, checked out, idle and overflow connections and wait statistics.
+        """
+        pool = (engine or self.engine).pool
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "checkouts": pool.checkouts,
+            "checkout_timeouts": pool.checkout_timeouts,
+            "checkout_wait_avg": pool.checkout_wait_total / pool.checkouts if pool.checkouts else 0.0,
+            "checkout_wait_max": pool.checkout_wait_max,
+        }
+
+    @asynccontextmanager
+    async def request_session(
+            self,
+            request: Request,
+            session_factory: async_sessionmaker[AsyncSession],
+    ) -> AsyncIterator[AsyncSession]:
+        """
+        Request Session
+        ---
+        description: Provides the one session of a request for the given session factory.
+            The first dependency to ask opens the session and owns it: work left uncommitted is
+            rolled back if the request fails, and the session is closed and its connection
+            returned to the pool when the request ends. Later dependencies of the same request
+            get the same session, so a request costs one checkout per transaction no matter how
+            many dependencies it has, and none if it is answered from caches.
+        parameters:
+            - name: request
+              in: body
+              description: Current request, the session is kept in its scope
+              required: true
+              schema:
+                type: object
+            - name: session_factory
+              in: body
+              description: Factory of the primary or of a replica
+              required: true
+              schema:
+                type: object
+        responses:
+            200:
+                description: Yields the session of the request.
+        """
+        sessions = request.scope.setdefault("db_sessions", {})
+        if session_factory in sessions:
+            yield sessions[session_factory]
+            return
+
+        async with session_factory() as session:
+            sessions[session_factory] = session
+            try:
+                yield session
+            except Exception:
+                await session.rollback()
+                raise
+            finally:
+                del sessions[session_factory]
+
+    async def session_dependency(self, request: Request) -> AsyncSession:
         """
         Session Dependency
         ---
-        description: Creates a new database session with context manager.
+        description: Provides the session of the request on the primary, see request_session.
         responses:
             200:
-                description: Returns a new database session.
+                description: Returns the database session of the request.
         """
-        async with self.session_factory() as session:
+        async with self.request_session(request, self.session_factory) as session:
             yield session
-            await session.close()
 
-    async def scoped_session_dependency(self) -> AsyncSession:
+    async def read_session_dependency(self, request: Request) -> AsyncSession:
         """
-        Scoped Session Dependency
+        Read Session Dependency
         ---
-        description: Creates a new scoped database session with context manager.
+        description: Provides the session of the request for read-only routes, bound to a replica
+            when available. Without replicas it is the same session as session_dependency.
         responses:
             200:
-                description: Returns a new scoped database session.
+                description: Returns the database session of the request.
         """
-        session = self.get_scoped_session()
-        yield session
-        await session.close()
+        client_key = self.client_key(request.headers.get("Authorization"))
+        session_factory = self.read_session_factory(client_key)
+        async with self.request_session(request, session_factory) as session:
+            yield session
 
 
 db_helper = DatabaseHelper(
     url=config.SQLALCHEMY_DATABASE_URL,
     echo=config.db_echo,
+    pool_size=config.db_pool_size,
+    max_overflow=config.db_max_overflow,
+    pool_timeout=config.db_pool_timeout,
+    pool_recycle=config.db_pool_recycle,
+    pool_pre_ping=config.db_pool_pre_ping,
+    statement_cache_size=config.db_statement_cache_size,
+    replica_urls=config.db_replica_urls,
+    replica_sticky_seconds=config.db_replica_sticky_seconds,
 )
@@ -1,7 +1,8 @@
 import datetime
 
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import func
+from sqlalchemy import func, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
 import enum
 
 from .base import Base
@@ -14,20 +15,66 @@ class ItemCategory(enum.Enum):
 
 
 class Item(Base):
+    __table_args__ = (
+        Index("ix_items_created_at_id", "created_at", "id"),
+        Index("ix_items_category_created_at_id", "category", "created_at", "id"),
+        Index("ix_items_price_id", "price", "id"),
+        Index("ix_items_quantity_id", "quantity", "id"),
+        Index("ix_items_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_items_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index(
+            "ix_items_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+    )
+
     name: Mapped[str] = mapped_column(server_default='0', unique=True)
     description: Mapped[str] = mapped_column(server_default='0')
     category: Mapped[ItemCategory] = mapped_column(nullable=False)
     quantity: Mapped[int] = mapped_column(server_default='0')
     price: Mapped[float] = mapped_column(server_default='0')
     created_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
+    version: Mapped[int] = mapped_column(server_default='1')
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed("to_tsvector('english', name || ' ' || description)", persisted=True),
+        deferred=True,
+    )
 
     def to_dict(self):
         return {
-            "id": Base.id,
+            "id": self.id,
             "name": self.name,
             "description": self.description,
             "category": self.category,
             "quantity": self.quantity,
             "price": self.price,
-            "created_at": self.created_at
+            "created_at": self.created_at,
+            "version": self.version
         }
+
+
+# create_all does not add columns to an existing items table, databases created before
+# a column was added get it here, keyed by column so that init_schema only alters items when
+# the column is missing. Adding a stored generated column rewrites the table once.
+ITEM_SCHEMA_DDL = {
+    "version": "ALTER TABLE items ADD COLUMN IF NOT EXISTS version integer NOT NULL DEFAULT 1",
+    "search_vector": """
+    ALTER TABLE items ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', name || ' ' || description)) STORED
+    """,
+}
+
+# create_all skips indexes of tables that already exist, so databases created before an
+# index was added get it here. Run outside a transaction, CONCURRENTLY does not block writes.
+ITEM_INDEX_DDL = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_created_at_id ON items (created_at, id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_category_created_at_id ON items (category, created_at, id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_price_id ON items (price, id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_quantity_id ON items (quantity, id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_search_vector ON items USING gin (search_vector)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_name_trgm ON items USING gin (name gin_trgm_ops)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_description_trgm ON items USING gin (description gin_trgm_ops)",
+)
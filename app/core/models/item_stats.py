@@ -0,0 +1,117 @@
+from sqlalchemy import Index, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+from .item import ItemCategory
+
+# Number of stats rows per category. Every statement adds its deltas to one random shard,
+# so concurrent writes to a category rarely wait for each other's row lock.
+ITEM_STATS_SHARDS = 16
+
+
+class ItemCategoryStats(Base):
+    """
+    Item Category Stats Class
+    ---
+    description: Running totals of the items of one category, split over ITEM_STATS_SHARDS rows
+        that are summed on read. Maintained by the statement level triggers in ITEM_STATS_TRIGGER_DDL
+        on every insert, update and delete of items, so reading them does not scan items.
+    """
+    __tablename__ = "item_category_stats"
+    __table_args__ = (
+        Index("ix_item_category_stats_category_shard", "category", "shard", unique=True),
+    )
+
+    category: Mapped[ItemCategory]
+    shard: Mapped[int] = mapped_column(server_default='0')
+    item_count: Mapped[int] = mapped_column(server_default='0')
+    total_quantity: Mapped[int] = mapped_column(server_default='0')
+    total_value: Mapped[float] = mapped_column(Numeric(asdecimal=False), server_default='0')
+    out_of_stock: Mapped[int] = mapped_column(server_default='0')
+
+
+_NEW_ROWS_DELTAS = """
+    SELECT category, 1 AS item_count, quantity AS total_quantity,
+           quantity * price::numeric AS total_value, (quantity <= 0)::int AS out_of_stock
+    FROM new_rows
+"""
+_OLD_ROWS_DELTAS = """
+    SELECT category, -1, -quantity, -(quantity * price::numeric), -(quantity <= 0)::int
+    FROM old_rows
+"""
+# Sums the deltas of the whole statement per category and applies them to one shard in
+# category order, so concurrent writes lock the stats rows in the same order and cannot deadlock.
+_APPLY_DELTAS = """
+            INSERT INTO item_category_stats AS stats
+                (category, shard, item_count, total_quantity, total_value, out_of_stock)
+            SELECT category, target_shard, sum(item_count), sum(total_quantity), sum(total_value),
+                   sum(out_of_stock)
+            FROM ({deltas}) AS deltas
+            GROUP BY category
+            HAVING sum(item_count) <> 0 OR sum(total_quantity) <> 0
+                OR sum(total_value) <> 0 OR sum(out_of_stock) <> 0
+            ORDER BY category
+            ON CONFLICT (category, shard) DO UPDATE SET
+                item_count = stats.item_count + EXCLUDED.item_count,
+                total_quantity = stats.total_quantity + EXCLUDED.total_quantity,
+                total_value = stats.total_value + EXCLUDED.total_value,
+                out_of_stock = stats.out_of_stock + EXCLUDED.out_of_stock;
+"""
+
+ITEM_STATS_FUNCTION_DDL = f"""
+    CREATE OR REPLACE FUNCTION item_category_stats_apply() RETURNS trigger AS $$
+    DECLARE
+        target_shard integer := floor(random() * {ITEM_STATS_SHARDS})::integer;
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            {_APPLY_DELTAS.format(deltas=_NEW_ROWS_DELTAS)}
+        ELSIF TG_OP = 'DELETE' THEN
+            {_APPLY_DELTAS.format(deltas=_OLD_ROWS_DELTAS)}
+        ELSE
+            {_APPLY_DELTAS.format(deltas=_NEW_ROWS_DELTAS + " UNION ALL " + _OLD_ROWS_DELTAS)}
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+# Installed by init_schema when missing, keyed by trigger name. DROP + CREATE instead of
+# CREATE OR REPLACE TRIGGER, which needs PostgreSQL 14. Transition tables need one trigger per
+# event and no UPDATE OF column list.
+ITEM_STATS_TRIGGER_DDL = {
+    "items_category_stats_insert": (
+        "DROP TRIGGER IF EXISTS items_category_stats_insert ON items",
+        """
+        CREATE TRIGGER items_category_stats_insert
+        AFTER INSERT ON items REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION item_category_stats_apply()
+        """,
+    ),
+    "items_category_stats_update": (
+        "DROP TRIGGER IF EXISTS items_category_stats_update ON items",
+        """
+        CREATE TRIGGER items_category_stats_update
+        AFTER UPDATE ON items REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION item_category_stats_apply()
+        """,
+    ),
+    "items_category_stats_delete": (
+        "DROP TRIGGER IF EXISTS items_category_stats_delete ON items",
+        """
+        CREATE TRIGGER items_category_stats_delete
+        AFTER DELETE ON items REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION item_category_stats_apply()
+        """,
+    ),
+}
+
+# Backfills the totals of items written before the triggers existed into shard 0.
+ITEM_STATS_BACKFILL_DDL = """
+    INSERT INTO item_category_stats (category, shard, item_count, total_quantity, total_value, out_of_stock)
+    SELECT category, 0, count(*), sum(quantity), sum(quantity * price::numeric),
+           count(*) FILTER (WHERE quantity <= 0)
+    FROM items
+    WHERE NOT EXISTS (SELECT 1 FROM item_category_stats)
+    GROUP BY category
+    ON CONFLICT (category, shard) DO NOTHING
+"""
@@ -0,0 +1,32 @@
+import datetime
+
+from sqlalchemy import func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class RefreshToken(Base):
+    """
+    Refresh Token Class
+    ---
+    description: Server-side record of an issued refresh token, stored as the SHA-256 of the
+        token so a leaked table does not leak usable tokens. Every refresh marks the record as
+        used and issues a new token of the same family; presenting a used token again deletes
+        the whole family, as does logout. Expired records are deleted in batches by
+        purge_expired_refresh_tokens.
+    """
+    __tablename__ = "refresh_tokens"
+
+    token_hash: Mapped[str] = mapped_column(unique=True)
+    username: Mapped[str] = mapped_column(index=True)
+    family: Mapped[str] = mapped_column(index=True)
+    created_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
+    expires_at: Mapped[datetime.datetime] = mapped_column(index=True)
+    used_at: Mapped[datetime.datetime | None]
+
+
+# Indexes added after the table first shipped, built by init_schema on existing databases.
+REFRESH_TOKEN_INDEX_DDL = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_refresh_tokens_expires_at ON refresh_tokens (expires_at)",
+)
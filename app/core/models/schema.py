@@ -0,0 +1,80 @@
+"""
+Schema
+---
+description: Creates the tables and migrates existing databases. Runs at startup unless
+    DB_INIT_SCHEMA_ON_STARTUP is false, in which case run it once per deploy instead:
+
+        python -m app.core.models.schema
+"""
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .base import Base
+from .db_helper import db_helper
+from .item import ITEM_INDEX_DDL, ITEM_SCHEMA_DDL
+from .refresh_token import REFRESH_TOKEN_INDEX_DDL
+from .item_stats import (
+    ITEM_STATS_BACKFILL_DDL,
+    ITEM_STATS_FUNCTION_DDL,
+    ITEM_STATS_TRIGGER_DDL,
+)
+
+# Key of the Postgres advisory lock held while the schema is migrated.
+SCHEMA_LOCK_KEY = 7_202_311_771
+
+
+async def init_schema(engine: AsyncEngine) -> None:
+    """
+    Init Schema
+    ---
+    description: Creates missing tables and brings existing ones up to date: adds missing item
+        columns, installs missing item stats triggers and builds missing indexes.
+        Holds an advisory lock meanwhile, so of several workers starting at once one migrates
+        and the others wait for it and then find nothing left to do. ALTER TABLE only runs for
+        missing columns and triggers, as it locks items even when there is nothing to change.
+    parameters:
+        - name: engine
+          in: body
+          description: Engine of the primary database
+          required: true
+          schema:
+            type: object
+    """
+    async with engine.connect() as lock_conn:
+        lock_conn = await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+        await lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                await conn.run_sync(Base.metadata.create_all)
+                columns = set(await conn.scalars(text(
+                    "SELECT column_name FROM information_schema.columns "
+                    "WHERE table_schema = current_schema() AND table_name = 'items'"
+                )))
+                for column, statement in ITEM_SCHEMA_DDL.items():
+                    if column not in columns:
+                        await conn.execute(text(statement))
+                await conn.execute(text(ITEM_STATS_FUNCTION_DDL))
+                triggers = set(await conn.scalars(text(
+                    "SELECT tgname FROM pg_trigger WHERE tgrelid = 'items'::regclass AND NOT tgisinternal"
+                )))
+                for trigger, statements in ITEM_STATS_TRIGGER_DDL.items():
+                    if trigger not in triggers:
+                        for statement in statements:
+                            await conn.execute(text(statement))
+                await conn.execute(text(ITEM_STATS_BACKFILL_DDL))
+            # CONCURRENTLY can not run inside a transaction, the lock connection is autocommit.
+            for statement in (*ITEM_INDEX_DDL, *REFRESH_TOKEN_INDEX_DDL):
+                await lock_conn.execute(text(statement))
+        finally:
+            await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEMA_LOCK_KEY})
+
+
+def main() -> None:
+    asyncio.run(init_schema(db_helper.engine))
+
+
+if __name__ == "__main__":
+    main()
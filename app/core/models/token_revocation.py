@@ -0,0 +1,25 @@
+import datetime
+
+from sqlalchemy import Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class TokenRevocation(Base):
+    """
+    Token Revocation Class
+    ---
+    description: Entry of the access token denylist. Revokes either one token by its jti, or
+        every token of a user issued before revoked_at, e.g. after a permission change.
+        Rows are useless once expires_at has passed, as the revoked tokens have expired too.
+    """
+    __tablename__ = "token_revocations"
+    __table_args__ = (
+        Index("ix_token_revocations_expires_at", "expires_at"),
+    )
+
+    jti: Mapped[str | None] = mapped_column(unique=True)
+    username: Mapped[str | None]
+    revoked_at: Mapped[datetime.datetime]
+    expires_at: Mapped[datetime.datetime]
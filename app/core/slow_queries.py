@@ -0,0 +1,162 @@
+import asyncio
+import atexit
+import datetime
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from functools import partial
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.metrics import request_context
+
+logger = logging.getLogger("app.slow_queries")
+
+_explain_tasks: set[asyncio.Task] = set()
+_listener: QueueListener | None = None
+
+
+def configure_slow_query_log(path: str | None = None) -> None:
+    """
+    Configure Slow Query Log
+    ---
+    description: Sends slow query records to a JSONL file, one JSON object per line.
+        Records are put on a queue and written by a background thread, so a slow disk does
+        not block the event loop. Calling it again stops the previous writer after it has
+        written the records queued so far.
+    parameters:
+        - name: path
+          in: body
+          description: File to append to, stderr if omitted
+          required: false
+          schema:
+            type: string
+    """
+    global _listener
+    handler = logging.FileHandler(path) if path else logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    records = queue.SimpleQueue()
+    logger.handlers = [QueueHandler(records)]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if _listener is not None:
+        _listener.stop()
+        atexit.unregister(_listener.stop)
+        for previous in _listener.handlers:
+            previous.close()
+    _listener = QueueListener(records, handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def log_slow_queries(engine: AsyncEngine, threshold: float, explain_rate: float = 0.0) -> None:
+    """
+    Log Slow Queries
+    ---
+    description: Logs every statement executed through the engine that takes longer than the
+        threshold, with its duration, the shape of its parameters (types and sizes, never the
+        values) and the route of the request that ran it. A sampled share of slow SELECTs is
+        run again as EXPLAIN (ANALYZE, BUFFERS) on a separate connection in the background,
+        and its plan is added to the record.
+    parameters:
+        - name: engine
+          in: body
+          description: Engine to watch
+          required: true
+          schema:
+            type: object
+        - name: threshold
+          in: body
+          description: Duration in seconds above which a statement is logged
+          required: true
+          schema:
+            type: number
+        - name: explain_rate
+          in: body
+          description: Share of slow SELECTs to explain, from 0 to 1
+          required: false
+          schema:
+            type: number
+    """
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(
+        engine.sync_engine,
+        "after_cursor_execute",
+        partial(_after_cursor_execute, engine, threshold, explain_rate),
+    )
+
+
+def parameter_shape(parameters: Any) -> Any:
+    """
+    Parameter Shape
+    ---
+    description: Describes bound parameters without their values, e.g. ["int", "str(12)"].
+    responses:
+        200:
+            description: Returns the JSON-serializable shape.
+    """
+    if isinstance(parameters, dict):
+        return {key: parameter_shape(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [parameter_shape(value) for value in parameters]
+    if isinstance(parameters, (str, bytes)):
+        return f"{type(parameters).__name__}({len(parameters)})"
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._slow_query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(
+        engine, threshold, explain_rate, conn, cursor, statement, parameters, context, executemany
+):
+    duration = time.perf_counter() - context._slow_query_started_at
+    if duration < threshold or context.execution_options.get("slow_query_explain"):
+        return
+    current = request_context.get()
+    record = {
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "duration_ms": round(duration * 1000, 3),
+        "statement": statement,
+        "parameters": (
+            {"rows": len(parameters), "shape": parameter_shape(parameters[0]) if parameters else None}
+            if executemany else parameter_shape(parameters)
+        ),
+        "method": current.scope.get("method") if current is not None else None,
+        "route": current.route if current is not None else None,
+        "database": engine.url.render_as_string(hide_password=True),
+    }
+    explain = (
+        not executemany
+        and statement.lstrip().upper().startswith("SELECT")
+        and random.random() < explain_rate
+    )
+    if explain:
+        task = asyncio.get_running_loop().create_task(_explain(engine, record, statement, parameters))
+        _explain_tasks.add(task)
+        task.add_done_callback(_explain_tasks.discard)
+    else:
+        logger.info(json.dumps(record, default=str))
+
+
+async def _explain(engine: AsyncEngine, record: dict, statement: str, parameters) -> None:
+    request_context.set(None)
+    try:
+        async with engine.connect() as conn:
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}",
+                parameters,
+                execution_options={"slow_query_explain": True},
+            )
+            record["plan"] = result.scalar()
+            await conn.rollback()
+    except Exception as error:
+        record["plan_error"] = repr(error)
+    logger.info(json.dumps(record, default=str))
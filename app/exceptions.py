@@ -16,6 +16,26 @@ class UserAlreadyExists(HTTPException):
         super().__init__(status_code=400, detail=detail)
 
 
+class Conflict(HTTPException):
+    def __init__(self, detail="Conflict"):
+        super().__init__(status_code=409, detail=detail)
+
+
+class PreconditionFailed(HTTPException):
+    def __init__(self, detail="Precondition failed"):
+        super().__init__(status_code=412, detail=detail)
+
+
 class Unauthorized(HTTPException):
     def __init__(self, detail="Unauthorize!"):
         super().__init__(status_code=401, detail=detail)
+
+
+class ServiceUnavailable(HTTPException):
+    def __init__(self, detail="Service temporarily unavailable, try again later", retry_after: int = 1):
+        super().__init__(status_code=503, detail=detail, headers={"Retry-After": str(retry_after)})
+
+
+class TooManyRequests(HTTPException):
+    def __init__(self, detail="Too many requests", retry_after: int = 1):
+        super().__init__(status_code=429, detail=detail, headers={"Retry-After": str(retry_after)})
@@ -0,0 +1,54 @@
+"""
+Password Hashing Benchmark
+---
+description: Measures what one login costs at different password hashing settings. A login
+    verifies the password once, so the verify time is the CPU time a worker thread spends per
+    login; the ceiling of logins per second assumes PASSWORD_HASH_WORKERS busy threads and no
+    other work. Use it to pick PASSWORD_HASH_SCHEME and PASSWORD_HASH_ROUNDS for a host.
+
+    Run with the application settings in the environment:
+        python -m benchmarks.hashing --settings bcrypt:10 bcrypt:12 bcrypt:14 --rounds 20
+"""
+import argparse
+import statistics
+
+from app.api.auth.helpers import password_context
+from app.core.config import config
+from benchmarks.serialization import measure
+
+PASSWORD = "correct horse battery staple"
+
+
+def parse_setting(setting: str) -> tuple[str, int | None]:
+    scheme, _, rounds = setting.partition(":")
+    return scheme, int(rounds) if rounds else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--settings", nargs="+", default=["bcrypt:10", "bcrypt:11", "bcrypt:12", "bcrypt:13"],
+        help="scheme:rounds pairs, rounds may be omitted for the passlib default",
+    )
+    parser.add_argument("--rounds", type=int, default=20, help="verifications per setting")
+    args = parser.parse_args()
+
+    workers = config.PASSWORD_HASH_WORKERS
+    print(f"{args.rounds} rounds, {workers} hashing workers")
+    print(f"{'setting':<18} {'hash ms':>9} {'verify ms':>10} {'p95 ms':>8} {'logins/s':>9}")
+    for setting in args.settings:
+        scheme, rounds = parse_setting(setting)
+        context = password_context(scheme=scheme, rounds=rounds)
+        hashed = context.hash(PASSWORD)
+        hashing = measure(lambda: context.hash(PASSWORD), max(1, args.rounds // 4))
+        verifying = sorted(measure(lambda: context.verify(PASSWORD, hashed), args.rounds))
+        verify = statistics.median(verifying)
+        p95 = verifying[int(len(verifying) * 0.95) - 1]
+        print(
+            f"{setting:<18} {statistics.median(hashing) * 1000:9.1f} {verify * 1000:10.1f} "
+            f"{p95 * 1000:8.1f} {workers / verify:9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
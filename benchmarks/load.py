@@ -0,0 +1,254 @@
+"""
+Load Benchmark
+---
+description: Drives the API with concurrent clients and records p50/p95/p99 latency and
+    throughput per scenario to a JSON report, optionally compared with a baseline.
+    Runs against the database configured in the environment, e.g. a local Postgres:
+
+        python -m benchmarks.seed --items 10000 --users 100
+        python -m benchmarks.load --mode asgi --concurrency 16 --requests 2000 --output report.json
+        python -m benchmarks.load --mode uvicorn --workers 2 --baseline report.json
+
+    "asgi" calls the app in-process through httpx.ASGITransport, which isolates the app from
+    the HTTP server. "uvicorn" starts the app as a subprocess and sends requests over a real
+    socket. The run exits with status 1 if any compared metric regressed beyond --tolerance.
+
+    All benchmark clients share one address, so the login scenario would mostly measure 429s.
+    The auth rate limits are therefore off unless --auth-rate-limit is given; the uvicorn
+    subprocess gets AUTH_RATE_LIMIT_ENABLED=false in its environment.
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from typing import AsyncIterator, Awaitable, Callable
+
+import httpx
+from faker import Faker
+
+from app.core.config import config
+from benchmarks.report import compare, format_comparison, summarize
+from benchmarks.seed import BENCH_PASSWORD, BENCH_USER_PREFIX, sample_item_ids, seed
+
+fake = Faker()
+
+API = config.api_v1_prefix
+
+
+class BenchContext:
+    def __init__(self, item_ids: list[int], users: int, token: str):
+        self.item_ids = item_ids
+        self.users = users
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+
+Scenario = Callable[[httpx.AsyncClient, BenchContext], Awaitable[httpx.Response]]
+
+
+async def list_items(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    return await client.get(f"{API}/items", params={"size": 50, "page": random.randint(1, 20)}, headers=ctx.headers)
+
+
+async def list_items_cursor(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    return await client.get(f"{API}/items/cursor", params={"size": 50}, headers=ctx.headers)
+
+
+async def get_item(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    return await client.get(f"{API}/items/{random.choice(ctx.item_ids)}", headers=ctx.headers)
+
+
+async def search_items(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    return await client.get(f"{API}/items/search", params={"q": fake.word()}, headers=ctx.headers)
+
+
+async def item_stats(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    return await client.get(f"{API}/items/stats", headers=ctx.headers)
+
+
+async def create_item(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    item = {
+        "name": f"bench-{uuid.uuid4().hex}",
+        "description": fake.sentence(nb_words=12),
+        "category": random.choice(["Weapon", "Cybernetic", "Gadget"]),
+        "quantity": random.randint(0, 500),
+        "price": random.randint(1, 2_000_000) / 100,
+    }
+    return await client.post(f"{API}/items", json=item, headers=ctx.headers)
+
+
+async def login(client: httpx.AsyncClient, ctx: BenchContext) -> httpx.Response:
+    username = f"{BENCH_USER_PREFIX}{random.randrange(ctx.users)}"
+    return await client.post(f"{API}/auth/login", data={"username": username, "password": BENCH_PASSWORD})
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "list_items": list_items,
+    "list_items_cursor": list_items_cursor,
+    "get_item": get_item,
+    "search_items": search_items,
+    "item_stats": item_stats,
+    "create_item": create_item,
+    "login": login,
+}
+
+
+async def run_scenario(
+        client: httpx.AsyncClient,
+        ctx: BenchContext,
+        scenario: Scenario,
+        requests: int,
+        concurrency: int,
+) -> dict:
+    """
+    Run Scenario
+    ---
+    description: Sends the given number of requests of one scenario from concurrent workers.
+    responses:
+        200:
+            description: Returns the summary of the scenario, see report.summarize.
+    """
+    remaining = iter(range(requests))
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await scenario(client, ctx)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+@contextlib.asynccontextmanager
+async def asgi_client() -> AsyncIterator[httpx.AsyncClient]:
+    from app import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            yield client
+
+
+@contextlib.asynccontextmanager
+async def uvicorn_client(port: int, workers: int, env: dict[str, str]) -> AsyncIterator[httpx.AsyncClient]:
+    server = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1",
+        "--port", str(port),
+        "--workers", str(workers),
+        "--log-level", "warning",
+    ], env={**os.environ, **env})
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+            for _ in range(100):
+                with contextlib.suppress(httpx.TransportError):
+                    await client.get("/metrics")
+                    break
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+                await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("uvicorn did not start in 10 seconds")
+            yield client
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    await seed(items=args.seed_items, users=args.seed_users)
+    item_ids = await sample_item_ids()
+
+    config.AUTH_RATE_LIMIT_ENABLED = args.auth_rate_limit
+    env = {"AUTH_RATE_LIMIT_ENABLED": str(args.auth_rate_limit).lower()}
+    client_context = asgi_client() if args.mode == "asgi" else uvicorn_client(args.port, args.workers, env)
+    async with client_context as client:
+        response = await client.post(
+            f"{API}/auth/login",
+            data={"username": f"{BENCH_USER_PREFIX}0", "password": BENCH_PASSWORD},
+        )
+        response.raise_for_status()
+        ctx = BenchContext(item_ids=item_ids, users=args.seed_users, token=response.json()["access_token"])
+
+        scenarios = {}
+        for name in args.scenarios:
+            await run_scenario(client, ctx, SCENARIOS[name], args.warmup, args.concurrency)
+            scenarios[name] = await run_scenario(client, ctx, SCENARIOS[name], args.requests, args.concurrency)
+            print(f"{name:<20} {json.dumps(scenarios[name])}")
+
+    return {
+        "meta": {
+            "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "mode": args.mode,
+            "workers": args.workers if args.mode == "uvicorn" else None,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "seed_items": args.seed_items,
+            "seed_users": args.seed_users,
+            "auth_rate_limit": args.auth_rate_limit,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def _git_revision() -> str | None:
+    with contextlib.suppress(OSError, subprocess.CalledProcessError):
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load benchmark of the API")
+    parser.add_argument("--mode", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=100, help="unmeasured requests per scenario")
+    parser.add_argument("--seed-items", type=int, default=10_000)
+    parser.add_argument("--seed-users", type=int, default=100)
+    parser.add_argument("--port", type=int, default=6011)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument(
+        "--auth-rate-limit", action="store_true", help="keep the login rate limits on, they reject most logins"
+    )
+    parser.add_argument("--output", default="benchmark-report.json")
+    parser.add_argument("--baseline", help="report to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative change, e.g. 0.1")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            rows = compare(report, json.load(file), args.tolerance)
+        print(format_comparison(rows))
+        if any(row["regressed"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark Report
+---
+description: Latency summaries of the load benchmark and their comparison with a baseline report.
+"""
+import statistics
+
+COMPARED_METRICS = {
+    # metric: True if higher is better
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "throughput_rps": True,
+}
+
+
+def percentile(sorted_values: list[float], share: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(share * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: list[float], errors: int, wall_time: float) -> dict:
+    """
+    Summarize
+    ---
+    description: Reduces the latencies of one scenario to its report entry.
+    parameters:
+        - name: latencies
+          in: body
+          description: Latency of every request in seconds
+          required: true
+          schema:
+            type: array
+        - name: errors
+          in: body
+          description: Requests that failed or got a 4xx/5xx response
+          required: true
+          schema:
+            type: integer
+        - name: wall_time
+          in: body
+          description: Seconds the scenario ran for
+          required: true
+          schema:
+            type: number
+    responses:
+        200:
+            description: Returns request and error counts, throughput and latency percentiles in ms.
+    """
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / wall_time, 2) if wall_time else 0.0,
+        "mean_ms": round(statistics.fmean(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[dict]:
+    """
+    Compare
+    ---
+    description: Compares every scenario present in both reports metric by metric.
+    parameters:
+        - name: report
+          in: body
+          description: Current report
+          required: true
+          schema:
+            type: object
+        - name: baseline
+          in: body
+          description: Baseline report
+          required: true
+          schema:
+            type: object
+        - name: tolerance
+          in: body
+          description: Relative change allowed before a metric counts as regressed, e.g. 0.1
+          required: true
+          schema:
+            type: number
+    responses:
+        200:
+            description: Returns one row per scenario and metric with the relative change and a regressed flag.
+    """
+    rows = []
+    for name, current in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            before, after = base[metric], current[metric]
+            change = (after - before) / before if before else 0.0
+            regressed = change < -tolerance if higher_is_better else change > tolerance
+            rows.append({
+                "scenario": name,
+                "metric": metric,
+                "baseline": before,
+                "current": after,
+                "change": round(change, 4),
+                "regressed": regressed,
+            })
+    return rows
+
+
+def format_comparison(rows: list[dict]) -> str:
+    lines = [f"{'scenario':<20} {'metric':<15} {'baseline':>10} {'current':>10} {'change':>8}"]
+    for row in rows:
+        flag = "  REGRESSED" if row["regressed"] else ""
+        lines.append(
+            f"{row['scenario']:<20} {row['metric']:<15} {row['baseline']:>10} {row['current']:>10} "
+            f"{row['change']:>+8.1%}{flag}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,103 @@
+"""
+Benchmark Seeding
+---
+description: Fills the configured database with fake items and users for the load benchmark.
+    Users get the same password, hashed once, so seeding does not spend minutes in bcrypt.
+
+    python -m benchmarks.seed --items 10000 --users 100
+"""
+import argparse
+import asyncio
+
+from faker import Faker
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.api.auth.helpers import pwd_context
+from app.core.models import Item, User, db_helper, init_schema
+from app.core.models.item import ItemCategory
+from app.core.models.user import Permission
+
+BENCH_USER_PREFIX = "bench-user-"
+BENCH_PASSWORD = "bench-password"
+BATCH_SIZE = 1000
+
+fake = Faker()
+
+
+async def seed(items: int, users: int) -> None:
+    """
+    Seed
+    ---
+    description: Creates or migrates the schema the same way the app does at startup, inserts
+        items until the table holds at least the requested number and creates the benchmark
+        users bench-user-0..N-1 if they do not exist yet.
+    parameters:
+        - name: items
+          in: body
+          description: Minimum number of items in the table
+          required: true
+          schema:
+            type: integer
+        - name: users
+          in: body
+          description: Number of benchmark users
+          required: true
+          schema:
+            type: integer
+    """
+    await init_schema(db_helper.engine)
+
+    async with db_helper.session_factory() as session:
+        existing = await session.scalar(select(func.count()).select_from(Item))
+        categories = list(ItemCategory)
+        for start in range(existing, items, BATCH_SIZE):
+            rows = [
+                {
+                    "name": f"{fake.word()}-{fake.word()}-{index}",
+                    "description": fake.sentence(nb_words=12),
+                    "category": categories[index % len(categories)],
+                    "quantity": fake.random_int(min=0, max=500),
+                    "price": fake.random_int(min=1, max=2_000_000) / 100,
+                }
+                for index in range(start, min(start + BATCH_SIZE, items))
+            ]
+            await session.execute(insert(Item).on_conflict_do_nothing(index_elements=[Item.name]), rows)
+            await session.commit()
+
+        hashed_password = pwd_context.hash(BENCH_PASSWORD)
+        await session.execute(
+            insert(User).on_conflict_do_nothing(index_elements=[User.username]),
+            [
+                {
+                    "username": f"{BENCH_USER_PREFIX}{index}",
+                    "permission": Permission.full_access,
+                    "hashed_password": hashed_password,
+                }
+                for index in range(users)
+            ],
+        )
+        await session.commit()
+
+
+async def sample_item_ids(limit: int = 1000) -> list[int]:
+    """
+    Sample Item IDs
+    ---
+    description: Returns ids of existing items for the single item scenarios.
+    """
+    async with db_helper.session_factory() as session:
+        result = await session.scalars(select(Item.id).order_by(func.random()).limit(limit))
+        return list(result)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed items and users for the benchmarks")
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(seed(items=args.items, users=args.users))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Serialization Microbenchmark
+---
+description: Compares the response path of a GET /items page before and after the switch to
+    plain rows and orjson. Both paths load the same page from an in-memory SQLite copy of the
+    items table, so the numbers cover row hydration and serialization but not the network or
+    Postgres itself.
+
+    Before: ORM Items -> create_page (validates Page[Item]) -> response_model validation
+    and serialization -> JSONResponse (stdlib json).
+    After: Core rows -> items_page_response (orjson).
+
+    Run with the application settings in the environment:
+        python -m benchmarks.serialization --size 100 --rounds 500
+"""
+import argparse
+import asyncio
+import datetime
+import statistics
+import time
+
+import orjson
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from fastapi_pagination import Page, Params, create_page
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import Session
+
+from app.api.items.crud import ITEM_COLUMNS
+from app.api.items.responses import items_page_response
+from app.api.items.schemas import Item as ItemRead
+from app.core.models import Item
+
+ITEMS_DDL = """
+CREATE TABLE items (
+    id INTEGER PRIMARY KEY,
+    name VARCHAR NOT NULL UNIQUE,
+    description VARCHAR NOT NULL,
+    category VARCHAR NOT NULL,
+    quantity INTEGER NOT NULL,
+    price FLOAT NOT NULL,
+    created_at DATETIME NOT NULL,
+    version INTEGER NOT NULL
+)
+"""
+
+
+def make_session(size: int) -> Session:
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(text(ITEMS_DDL))
+        connection.execute(
+            text(
+                "INSERT INTO items (name, description, category, quantity, price, created_at, version) "
+                "VALUES (:name, :description, :category, :quantity, :price, :created_at, 1)"
+            ),
+            [
+                {
+                    "name": f"item-{i}",
+                    "description": f"Description of item {i} with a few more words in it",
+                    "category": ("Weapon", "Cybernetic", "Gadget")[i % 3],
+                    "quantity": i,
+                    "price": i * 1.25,
+                    "created_at": datetime.datetime(2024, 1, 1) + datetime.timedelta(minutes=i),
+                }
+                for i in range(size)
+            ],
+        )
+    return Session(engine)
+
+
+def render_before(session: Session, response_field, params: Params, loop: asyncio.AbstractEventLoop) -> bytes:
+    items = list(session.scalars(select(Item).order_by(Item.id).limit(params.size)))
+    session.expunge_all()
+    page = create_page(items, total=len(items), params=params)
+    content = loop.run_until_complete(serialize_response(field=response_field, response_content=page))
+    return JSONResponse(content=content).body
+
+
+def render_after(session: Session, params: Params) -> bytes:
+    items = session.execute(select(*ITEM_COLUMNS).order_by(Item.id).limit(params.size)).all()
+    page = {"items": items, "total": len(items), "page": 1, "size": params.size, "pages": 1}
+    return items_page_response(page).body
+
+
+def measure(func, rounds: int) -> list[float]:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{name:<7} median {statistics.median(timings) * 1000:8.3f} ms   p95 {p95 * 1000:8.3f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=100, help="items per page")
+    parser.add_argument("--rounds", type=int, default=500, help="pages rendered per path")
+    args = parser.parse_args()
+
+    session = make_session(args.size)
+    params = Params(page=1, size=args.size)
+    response_field = create_response_field(name="response", type_=Page[ItemRead])
+    loop = asyncio.new_event_loop()
+
+    before_body = render_before(session, response_field, params, loop)
+    after_body = render_after(session, params)
+    assert orjson.loads(before_body) == orjson.loads(after_body), "paths render different pages"
+
+    before = measure(lambda: render_before(session, response_field, params, loop), args.rounds)
+    after = measure(lambda: render_after(session, params), args.rounds)
+    print(f"page of {args.size} items, {args.rounds} rounds")
+    report("before", before)
+    report("after", after)
+    print(f"speedup x{statistics.median(before) / statistics.median(after):.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
+import asyncio
+import json
+
 import pytest
 
 from faker import Faker
+from fastapi import HTTPException
 from httpx import AsyncClient
 
 from app import app
@@ -66,6 +70,169 @@ async def test_wrong_password(client):
     assert response.status_code == 400
 
 
+@pytest.mark.anyio
+async def test_logout_revokes_token(client):
+    from jose import jwt
+
+    response = await client.post("api/v1/auth/login", data=test_user)
+    token = response.json()["access_token"]
+    assert {"perm", "jti", "iat"} <= jwt.get_unverified_claims(token).keys()
+    headers = {"Authorization": f"Bearer {token}"}
+    response = await client.post("api/v1/auth/logout", headers=headers)
+    assert response.status_code == 200
+    response = await client.get("api/v1/items", params={"size": 1}, headers=headers)
+    assert response.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_login_rate_limit(client):
+    from app.core.config import config
+
+    credentials = {"username": fake.user_name() + fake.numerify("####"), "password": "wrong"}
+    for _ in range(config.AUTH_USERNAME_BURST):
+        response = await client.post("api/v1/auth/login", data=credentials)
+        assert response.status_code == 400
+    response = await client.post("api/v1/auth/login", data=credentials)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_username_rate_limit_spans_client_ips():
+    from app import exceptions
+    from app.api.auth.rate_limit import admit_auth_attempt
+    from app.core.config import config
+
+    username = fake.user_name() + fake.numerify("####")
+    for attempt in range(config.AUTH_USERNAME_BURST):
+        admit_auth_attempt(username=username, client_ip=f"203.0.113.{attempt}")
+    with pytest.raises(exceptions.TooManyRequests):
+        admit_auth_attempt(username=username, client_ip="198.51.100.1")
+
+
+@pytest.mark.anyio
+async def test_login_rehashes_outdated_password(client, monkeypatch):
+    from sqlalchemy import select
+    from app.api.auth import helpers
+    from app.core.models import db_helper, User
+
+    monkeypatch.setattr(helpers, "pwd_context", helpers.password_context(scheme="bcrypt", rounds=5))
+    credentials = {"username": fake.user_name() + fake.numerify("####"), "password": "outdated"}
+    async with db_helper.session_factory() as session:
+        session.add(User(
+            username=credentials["username"],
+            hashed_password=helpers.password_context(scheme="bcrypt", rounds=4).hash(credentials["password"]),
+        ))
+        await session.commit()
+    response = await client.post("api/v1/auth/login", data=credentials)
+    assert response.status_code == 200
+    await asyncio.gather(*helpers._rehash_tasks)
+    async with db_helper.session_factory() as session:
+        hashed_password = await session.scalar(
+            select(User.hashed_password).where(User.username == credentials["username"])
+        )
+    assert not helpers.pwd_context.needs_update(hashed_password)
+    assert helpers.pwd_context.verify(credentials["password"], hashed_password)
+
+
+@pytest.mark.anyio
+async def test_password_work_runs_on_executor():
+    import threading
+    from app.api.auth import helpers
+
+    thread_name = await helpers.run_password_work(lambda: threading.current_thread().name)
+    assert thread_name.startswith("password-hash")
+
+
+@pytest.mark.anyio
+async def test_password_work_queue_timeout(monkeypatch):
+    from app.api.auth import helpers
+    from app.core.config import config
+
+    monkeypatch.setattr(config, "PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", 0.01)
+    monkeypatch.setattr(helpers, "password_slots", asyncio.Semaphore(1))
+    await helpers.password_slots.acquire()
+    with pytest.raises(HTTPException) as error:
+        await helpers.run_password_work(helpers.pwd_context.hash, "password")
+    assert error.value.status_code == 503
+    assert error.value.headers["Retry-After"] == "1"
+    assert helpers.password_admission.in_use == 0
+
+
+@pytest.mark.anyio
+async def test_password_work_queue_full(monkeypatch):
+    from app.api.auth import helpers
+    from app.api.auth.rate_limit import ConcurrencyLimiter
+
+    monkeypatch.setattr(helpers, "password_admission", ConcurrencyLimiter(limit=1))
+    assert helpers.password_admission.try_acquire()
+    with pytest.raises(HTTPException) as error:
+        await helpers.run_password_work(helpers.pwd_context.hash, "password")
+    assert error.value.status_code == 429
+    assert "Retry-After" in error.value.headers
+    assert helpers.password_admission.rejected == 1
+
+
+@pytest.mark.anyio
+async def test_refresh_token_rotation(client):
+    response = await client.post("api/v1/auth/login", data=test_user)
+    refresh_token = response.json()["refresh_token"]
+    response = await client.post("api/v1/auth/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != refresh_token
+    headers = {"Authorization": f"Bearer {rotated['access_token']}"}
+    response = await client.get("api/v1/items", params={"size": 1}, headers=headers)
+    assert response.status_code == 200
+    response = await client.post("api/v1/auth/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 401
+    response = await client.post("api/v1/auth/refresh", json={"refresh_token": rotated["refresh_token"]})
+    assert response.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_logout_revokes_refresh_token(client):
+    from sqlalchemy import select
+    from app.api.auth.helpers import hash_refresh_token
+    from app.core.models import db_helper, RefreshToken
+
+    tokens = (await client.post("api/v1/auth/login", data=test_user)).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    rotated = (await client.post("api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})).json()
+    response = await client.post(
+        "api/v1/auth/logout", json={"refresh_token": rotated["refresh_token"]}, headers=headers
+    )
+    assert response.status_code == 200
+    response = await client.post("api/v1/auth/refresh", json={"refresh_token": rotated["refresh_token"]})
+    assert response.status_code == 401
+
+    async with db_helper.session_factory() as session:
+        stored = await session.scalar(
+            select(RefreshToken).where(RefreshToken.token_hash == hash_refresh_token(rotated["refresh_token"]))
+        )
+    assert stored is None
+
+
+@pytest.mark.anyio
+async def test_purge_expired_refresh_tokens():
+    import datetime
+    from sqlalchemy import func, select
+    from app.api.auth.helpers import purge_expired_refresh_tokens
+    from app.core.models import db_helper, RefreshToken
+
+    expired_at = datetime.datetime(2000, 1, 1)
+    family = fake.uuid4()
+    async with db_helper.session_factory() as session:
+        session.add_all([
+            RefreshToken(token_hash=fake.sha256(), username=test_user["username"], family=family, expires_at=expired_at)
+            for _ in range(5)
+        ])
+        await session.commit()
+    assert await purge_expired_refresh_tokens(db_helper.session_factory, batch_size=2) >= 5
+    async with db_helper.session_factory() as session:
+        left = await session.scalar(select(func.count()).select_from(RefreshToken).where(RefreshToken.family == family))
+    assert left == 0
+
+
 @pytest.mark.anyio
 async def test_get_items(client, login):
     headers = {"Authorization": f"Bearer {login}"}
@@ -135,3 +302,647 @@ async def test_update_item(client, login):
         headers=headers)
     assert response.status_code == 200
     assert response.json()["name"] == new_name
+
+
+@pytest.mark.anyio
+async def test_get_items_by_cursor(client, login):
+    headers = {"Authorization": f"Bearer {login}"}
+    price = 900_000 + fake.random_int(min=1, max=99_999) / 100
+    created_ids = []
+    for _ in range(5):
+        test_item = {"name": f"{fake.word()}-{fake.uuid4()}",
+                     "description": fake.sentence(),
+                     "category": "Gadget",
+                     "quantity": 1,
+                     "price": price
+                     }
+        response = await client.post("api/v1/items", json=test_item, headers=headers)
+        created_ids.append(response.json()["id"])
+
+    params = {"size": 2, "min_price": price, "max_price": price}
+    pages = []
+    cursor = None
+    for _ in range(len(created_ids)):
+        response = await client.get(
+            url="api/v1/items/cursor",
+            params={**params, "cursor": cursor} if cursor else params,
+            headers=headers)
+        assert response.status_code == 200
+        pages.append([item["id"] for item in response.json()["items"]])
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == [created_ids[4:2:-1], created_ids[2:0:-1], created_ids[:1]]
+    assert cursor is None
+
+
+@pytest.mark.anyio
+async def test_get_items_bad_cursor(client, login):
+    headers = {"Authorization": f"Bearer {login}"}
+    response = await client.get(url="api/v1/items/cursor", params={"cursor": "garbage"}, headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_get_items_forged_cursor(client, login):
+    import base64
+
+    headers = {"Authorization": f"Bearer {login}"}
+    forged = (
+        ("price", "asc", ["price:asc", "abc", 1]),
+        ("price", "asc", ["price:asc", {"datetime": "2024-01-01T00:00:00"}, 1]),
+        ("quantity", "asc", ["quantity:asc", 1.5, 1]),
+        ("name", "asc", ["name:asc", 5, 1]),
+        ("created_at", "desc", ["created_at:desc", 5, 1]),
+        ("created_at", "desc", ["created_at:desc", {"datetime": "2024-01-01T00:00:00+02:00"}, 1]),
+        ("created_at", "desc", ["created_at:desc", {"datetime": "2024-01-01T00:00:00"}, "1"]),
+        ("price", "asc", ["price:asc", 1.5, 2 ** 40]),
+    )
+    for sort_by, order, payload in forged:
+        cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        params = {"cursor": cursor, "sort_by": sort_by, "order": order}
+        response = await client.get(url="api/v1/items/cursor", params=params, headers=headers)
+        assert response.status_code == 400, payload
+
+
+@pytest.mark.anyio
+async def test_current_user_is_cached(client, login):
+    from app.api.auth.helpers import user_cache
+    from app.api.auth.schemas import TokenUser
+
+    headers = {"Authorization": f"Bearer {login}"}
+    await client.get("api/v1/items/cursor", params={"size": 1}, headers=headers)
+    hits = user_cache.stats()["hits"]
+    response = await client.get("api/v1/items/cursor", params={"size": 1}, headers=headers)
+    assert response.status_code == 200
+    assert user_cache.stats()["hits"] == hits + 1
+    assert isinstance(user_cache.get(test_user["username"]), TokenUser)
+
+
+@pytest.mark.anyio
+async def test_stateless_auth(client, monkeypatch):
+    from sqlalchemy import select
+    from app.api.auth import helpers
+    from app.api.auth.schemas import TokenUser
+    from app.core.config import config
+    from app.core.models import db_helper, User
+    from app.core.models.user import Permission
+
+    monkeypatch.setattr(config, "STATELESS_AUTH", True)
+    user = await helpers.get_current_user(payload={"sub": "nobody", "perm": "read_only"}, session=None)
+    assert user == TokenUser(username="nobody", permission=Permission.read_only)
+    assert helpers.user_cache.get("nobody") is None
+
+    credentials = {"username": fake.user_name() + fake.numerify("####"),
+                   "password": fake.word(),
+                   "permission": "full_access"
+                   }
+    await client.post("api/v1/auth/registration", json=credentials)
+    token = (await client.post("api/v1/auth/login", data=credentials)).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    test_item = {"name": f"{fake.word()}-{fake.uuid4()}",
+                 "description": fake.sentence(),
+                 "category": "Gadget",
+                 "quantity": 1,
+                 "price": 1.0
+                 }
+    item_id = (await client.post("api/v1/items", json=test_item, headers=headers)).json()["id"]
+    await client.get(f"api/v1/items/{item_id}", headers=headers)
+    helpers.user_cache.clear()
+    pool = db_helper.engine.pool
+    checkouts = pool.checkouts
+    response = await client.get(f"api/v1/items/{item_id}", headers=headers)
+    assert response.status_code == 200
+    assert pool.checkouts == checkouts
+
+    async with db_helper.session_factory() as session:
+        user = await session.scalar(select(User).where(User.username == credentials["username"]))
+        user.permission = Permission.read_only
+        await session.commit()
+    response = await client.get(f"api/v1/items/{item_id}", headers=headers)
+    assert response.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_token_denylist_keeps_additions_during_refresh():
+    from app.api.auth.denylist import TokenDenylist
+    from app.core.models import TokenRevocation, db_helper
+
+    denylist = TokenDenylist()
+    revocation = TokenRevocation(jti="added-during-refresh")
+
+    def session_factory():
+        # A logout whose revocation is not in the table yet when the refresh reads it.
+        denylist.add([revocation])
+        return db_helper.session_factory()
+
+    await denylist.refresh(session_factory)
+    assert denylist.is_revoked({"sub": "nobody", "jti": "added-during-refresh"})
+
+
+@pytest.mark.anyio
+async def test_create_items_bulk(client, login):
+    headers = {"Authorization": f"Bearer {login}"}
+    name = f"{fake.word()}-{fake.uuid4()}"
+    test_items = [
+        {"name": name,
+         "description": fake.sentence(),
+         "category": "Weapon",
+         "quantity": fake.random_int(min=1, max=20),
+         "price": fake.random_int(min=1, max=20000) / 100
+         },
+        {"name": name,
+         "description": fake.sentence(),
+         "category": "Weapon",
+         "quantity": 1,
+         "price": 1.0
+         },
+    ]
+    response = await client.post("api/v1/items/bulk", json=test_items, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["created"] == 1
+    assert [row["status"] for row in response.json()["results"]] == ["created", "conflict"]
+
+    ndjson = "\n".join(json.dumps(item) for item in test_items)
+    response = await client.post(
+        "api/v1/items/bulk",
+        content=ndjson,
+        headers={**headers, "Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert response.json()["conflicts"] == 2
+
+
+@pytest.mark.anyio
+async def test_create_items_bulk_needs_permission_before_parsing(client):
+    reader = {"username": fake.user_name() + fake.numerify("####"), "password": fake.word(), "permission": "read_only"}
+    await client.post("api/v1/auth/registration", json=reader)
+    token = (await client.post("api/v1/auth/login", data=reader)).json()["access_token"]
+    response = await client.post(
+        "api/v1/items/bulk",
+        content="not json",
+        headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_export_items(client, login):
+    headers = {"Authorization": f"Bearer {login}"}
+    response = await client.get("api/v1/items/export", params={"format": "csv"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.text.splitlines()[0] == "id,name,description,category,quantity,price,created_at"
+
+    response = await client.get(
+        "api/v1/items/export",
+        params={"format": "ndjson", "category": "Weapon"},
+        headers=headers)
+    assert response.status_code == 200
+    assert all(json.loads(line)["category"] == "Weapon" for line in response.text.splitlines())
+
+
+@pytest.mark.anyio
+async def test_patch_item(client, login):
+    headers = {"Authorization": f"Bearer {login}"}
+    test_item = {"name": fake.word(),
+                 "description": fake.sentence(),
+                 "category": "Gadget",
+                 "quantity": fake.random_int(min=1, max=20),
+                 "price": fake.random_int(min=1, max=20000) / 100
+                 }
+    response_creation = await client.post("api/v1/items", json=test_item, headers=headers)
+    response = await client.patch(
+        f"api/v1/items/{response_creation.json().get('id')}",
+        json={"quantity": 0},
+        headers=headers)
+    assert response.status_code == 200
+    assert response.json()["quantity"] == 0
+    assert response.json()["name"] == test_item["name"]
+
+
+@pytest.mark.anyio
+async def test_update_missing_item(client, login):
+    headers = {"Authorization": f"Bearer {login}"}
+    response = await client.patch("api/v1/items/0", json={"quantity": 1}, headers=headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_adjust_item_quantity(client, login):
+    headers = {"Authorization": f"Bearer {login}"}
+    test_item = {"name": f"{fake.word()}-{fake.uuid4()}",
+                 "description": fake.sentence(),
+                 "category": "Cybernetic",
+                 "quantity": 10,
+                 "price": fake.random_int(min=1, max=20000) / 100
+                 }
+    response_creation = await client.post("api/v1/items", json=test_item, headers=headers)
+    item_id = response_creation.json().get('id')
+
+    responses = await asyncio.gather(*[
+        client.post(f"api/v1/items/{item_id}/adjust", json={"delta": -1}, headers=headers)
+        for _ in range(5)
+    ])
+    assert all(response.status_code == 200 for response in responses)
+    response = await client.get(f"api/v1/items/{item_id}", headers=headers)
+    assert response.json()["quantity"] == 5
+
+    response = await client.post(
+        f"api/v1/items/{item_id}/adjust",
+        json={"delta": -6, "prevent_negative": True},
+        headers=headers)
+    assert response.status_code == 409
+
+
+@pytest.mark.anyio
+async def test_system_stats(client, login):
+    headers = {"Authorization": f"Bearer {login}"}
+    response = await client.get("api/v1/system/stats", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["db_pool"]["checkouts"] > 0
+    assert "hits" in response.json()["user_cache"]
+
+
+@pytest.mark.anyio
+async def test_metrics(client, login):
+    headers = {"Authorization": f"Bearer {login}"}
+    await client.get("api/v1/items", params={"size": 1}, headers=headers)
+    response = await client.get("metrics")
+    assert response.status_code == 200
+    assert 'http_requests_total{method="GET",route="/api/v1/items",status="200"}' in response.text
+    assert 'db_queries_per_request_count{route="/api/v1/items"}' in response.text
+
+
+@pytest.mark.anyio
+async def test_one_connection_per_request(client, login):
+    from sqlalchemy import event
+    from app.core.models import db_helper
+    from app.api.auth.helpers import user_cache
+    from app.api.items.crud import item_cache
+
+    headers = {"Authorization": f"Bearer {login}"}
+    test_item = {"name": f"{fake.word()}-{fake.uuid4()}",
+                 "description": fake.sentence(),
+                 "category": "Gadget",
+                 "quantity": 1,
+                 "price": 1.0
+                 }
+    item_id = (await client.post("api/v1/items", json=test_item, headers=headers)).json()["id"]
+    pool = db_helper.engine.pool
+    transactions = []
+    event.listen(db_helper.engine.sync_engine, "begin", transactions.append)
+
+    stale = {**headers, "If-Match": f'"{item_id}-0"'}
+    requests = (
+        ("PUT", f"api/v1/items/{item_id}", {"description": fake.sentence()}, headers, 200),
+        ("PUT", "api/v1/items/0", {"description": fake.sentence()}, headers, 404),
+        ("PUT", f"api/v1/items/{item_id}", {"description": fake.sentence()}, stale, 412),
+        ("POST", f"api/v1/items/{item_id}/adjust", {"delta": -1000, "prevent_negative": True}, headers, 409),
+        ("POST", "api/v1/items/0/adjust", {"delta": 1}, headers, 404),
+        ("DELETE", f"api/v1/items/{item_id}", None, stale, 412),
+        ("DELETE", "api/v1/items/0", None, headers, 404),
+        ("GET", "api/v1/items", None, headers, 200),
+    )
+    try:
+        for method, url, body, request_headers, status_code in requests:
+            user_cache.clear()
+            await item_cache.clear()
+            checkouts = pool.checkouts
+            transactions.clear()
+            response = await client.request(method, url, json=body, headers=request_headers)
+            assert response.status_code == status_code, (method, url)
+            assert pool.checkouts == checkouts + 1
+            assert len(transactions) == 1
+            assert pool.checkedout() == 0
+    finally:
+        event.remove(db_helper.engine.sync_engine, "begin", transactions.append)
+
+    await client.get(f"api/v1/items/{item_id}", headers=headers)
+    checkouts = pool.checkouts
+    await client.get(f"api/v1/items/{item_id}", headers=headers)
+    assert pool.checkouts == checkouts
+
+
+def test_slow_query_parameter_shape():
+    from app.core.slow_queries import parameter_shape
+
+    assert parameter_shape(("secret", 3, None)) == ["str(6)", "int", "NoneType"]
+    assert parameter_shape({"name": b"ab", "ids": [1, 2]}) == {"name": "bytes(2)", "ids": ["int", "int"]}
+
+
+@pytest.mark.anyio
+async def test_slow_query_log(tmp_path):
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from app.core.config import config
+    from app.core.slow_queries import configure_slow_query_log, log_slow_queries
+
+    engine = create_async_engine(config.SQLALCHEMY_DATABASE_URL)
+    log_slow_queries(engine, threshold=0.05)
+    path = tmp_path / "slow.jsonl"
+    configure_slow_query_log(str(path))
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": 0.1})
+            await conn.execute(text("SELECT 1"))
+    finally:
+        # Stops the writer of the test file after it has written everything queued.
+        configure_slow_query_log(config.db_slow_query_log)
+        await engine.dispose()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(records) == 1
+    assert records[0]["statement"].startswith("SELECT pg_sleep")
+    assert records[0]["duration_ms"] >= 100
+    assert records[0]["parameters"] == ["float"]
+
+
+def test_read_session_routing():
+    from app.core.config import config
+    from app.core.models import DatabaseHelper
+
+    helper = DatabaseHelper(
+        url=config.SQLALCHEMY_DATABASE_URL,
+        replica_urls=[config.SQLALCHEMY_DATABASE_URL, config.SQLALCHEMY_DATABASE_URL],
+    )
+    replica_engines = {factory.kw["bind"] for factory in (
+        helper.read_session_factory("reader"),
+        helper.read_session_factory("reader"),
+    )}
+    assert replica_engines == set(helper.replica_engines)
+
+    helper.mark_writer("writer")
+    assert helper.read_session_factory("writer") is helper.session_factory
+
+    from app.api.auth.helpers import create_access_token
+
+    old_token, refreshed_token = (create_access_token(data={"sub": "refresher"}) for _ in range(2))
+    helper.mark_writer(helper.client_key(f"Bearer {old_token}"))
+    assert helper.read_session_factory(helper.client_key(f"Bearer {refreshed_token}")) is helper.session_factory
+    assert helper.client_key("Bearer garbage") is None
+    assert helper.client_key(None) is None
+    assert helper.read_session_factory("reader").kw["bind"] in helper.replica_engines
+
+    primary_only = DatabaseHelper(url=config.SQLALCHEMY_DATABASE_URL)
+    assert primary_only.read_session_factory("reader") is primary_only.session_factory
+
+
+@pytest.mark.anyio
+async def test_get_items_filtered_and_sorted(client, login):
+    headers = {"Authorization": f"Bearer {login}"}
+    params = {"category": "Gadget", "min_price": 1, "sort_by": "price", "order": "asc", "size": 10}
+    response = await client.get(url="api/v1/items", params=params, headers=headers)
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert all(item["category"] == "Gadget" and item["price"] >= 1 for item in items)
+    assert [item["price"] for item in items] == sorted(item["price"] for item in items)
+
+    response = await client.get(url="api/v1/items", params={"sort_by": "description"}, headers=headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_get_items_invalid_filters(client, login):
+    headers = {"Authorization": f"Bearer {login}"}
+    for url in ("api/v1/items", "api/v1/items/cursor", "api/v1/items/export"):
+        response = await client.get(url, params={"min_price": -1}, headers=headers)
+        assert response.status_code == 422
+    response = await client.get("api/v1/items/search", params={"q": "blade", "max_price": -1}, headers=headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_get_items_created_range_with_time_zone(client, login):
+    headers = {"Authorization": f"Bearer {login}"}
+    naive = await client.get(
+        "api/v1/items", params={"created_from": "2024-01-01T00:00:00", "size": 5}, headers=headers)
+    assert naive.status_code == 200
+    for created_from in ("2024-01-01T00:00:00Z", "2024-01-01T02:00:00+02:00"):
+        response = await client.get(
+            "api/v1/items", params={"created_from": created_from, "size": 5}, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["total"] == naive.json()["total"]
+
+
+@pytest.mark.anyio
+async def test_get_items_total_modes(client, login):
+    headers = {"Authorization": f"Bearer {login}"}
+    params = {"category": "Gadget", "size": 5}
+    exact = (await client.get("api/v1/items", params=params, headers=headers)).json()
+
+    response = await client.get("api/v1/items", params={**params, "total_mode": "cached"}, headers=headers)
+    assert response.json()["total"] == exact["total"]
+
+    response = await client.get("api/v1/items", params={**params, "total_mode": "none"}, headers=headers)
+    assert response.json()["total"] is None
+    assert response.json()["items"] == exact["items"]
+
+    response = await client.get("api/v1/items", params={"total_mode": "estimated"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["total"] >= 0
+
+
+@pytest.mark.anyio
+async def test_list_items_match_item_schema(client, login):
+    headers = {"Authorization": f"Bearer {login}"}
+    for url in ("api/v1/items", "api/v1/items/cursor"):
+        response = await client.get(url, params={"size": 5}, headers=headers)
+        assert response.status_code == 200
+        for item in response.json()["items"]:
+            response = await client.get(f"api/v1/items/{item['id']}", headers=headers)
+            assert response.json() == item
+
+
+@pytest.mark.anyio
+async def test_item_fields(client, login):
+    headers = {"Authorization": f"Bearer {login}"}
+    params = {"size": 5, "fields": "name,id,quantity"}
+    response = await client.get("api/v1/items", params=params, headers=headers)
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert all(list(item) == ["id", "name", "quantity"] for item in items)
+
+    if items:
+        response = await client.get(f"api/v1/items/{items[0]['id']}", params={"fields": "name"}, headers=headers)
+        assert response.json() == {"name": items[0]["name"]}
+
+    response = await client.get("api/v1/items/export", params={"format": "csv", "fields": "id,name"}, headers=headers)
+    assert response.text.splitlines()[0] == "id,name"
+
+    response = await client.get("api/v1/items", params={"fields": "name,secret"}, headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_item_stats(client, login):
+    headers = {"Authorization": f"Bearer {login}"}
+
+    async def weapon_stats():
+        response = await client.get("api/v1/items/stats", headers=headers)
+        assert response.status_code == 200
+        return next(row for row in response.json()["categories"] if row["category"] == "Weapon")
+
+    before = await weapon_stats()
+    test_item = {"name": f"{fake.word()}-{fake.uuid4()}",
+                 "description": fake.sentence(),
+                 "category": "Weapon",
+                 "quantity": 0,
+                 "price": 10.0
+                 }
+    item_id = (await client.post("api/v1/items", json=test_item, headers=headers)).json()["id"]
+    created = await weapon_stats()
+    assert created["item_count"] == before["item_count"] + 1
+    assert created["out_of_stock"] == before["out_of_stock"] + 1
+
+    await client.post(f"api/v1/items/{item_id}/adjust", json={"delta": 3}, headers=headers)
+    adjusted = await weapon_stats()
+    assert adjusted["total_quantity"] == before["total_quantity"] + 3
+    assert adjusted["total_value"] == pytest.approx(before["total_value"] + 30)
+    assert adjusted["out_of_stock"] == before["out_of_stock"]
+
+    await client.delete(f"api/v1/items/{item_id}", headers=headers)
+    assert await weapon_stats() == before
+
+
+@pytest.mark.anyio
+async def test_search_items(client, login):
+    headers = {"Authorization": f"Bearer {login}"}
+    name = f"mantis{fake.uuid4().hex}"
+    test_item = {"name": name,
+                 "description": "Arm blades for close combat",
+                 "category": "Cybernetic",
+                 "quantity": 1,
+                 "price": 99.9
+                 }
+    await client.post("api/v1/items", json=test_item, headers=headers)
+
+    response = await client.get("api/v1/items/search", params={"q": name}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["items"][0]["name"] == name
+
+    response = await client.get("api/v1/items/search", params={"q": name[:-1]}, headers=headers)
+    assert name in [item["name"] for item in response.json()["items"]]
+
+
+@pytest.mark.anyio
+async def test_search_items_max_results(client, login, monkeypatch):
+    from app.core.config import config
+
+    headers = {"Authorization": f"Bearer {login}"}
+    tag = f"sandevistan{fake.uuid4().hex}"
+    for _ in range(3):
+        test_item = {"name": f"{fake.word()}-{fake.uuid4()}",
+                     "description": f"Reflex booster {tag}",
+                     "category": "Cybernetic",
+                     "quantity": 1,
+                     "price": 10.0
+                     }
+        await client.post("api/v1/items", json=test_item, headers=headers)
+
+    monkeypatch.setattr(config, "item_search_max_results", 2)
+    response = await client.get("api/v1/items/search", params={"q": tag, "size": 1}, headers=headers)
+    assert len(response.json()["items"]) == 1
+    cursor = response.json()["next_cursor"]
+    response = await client.get("api/v1/items/search", params={"q": tag, "size": 1, "cursor": cursor}, headers=headers)
+    assert len(response.json()["items"]) == 1
+    assert response.json()["next_cursor"] is None
+
+
+@pytest.mark.anyio
+async def test_search_items_forged_cursor(client, login):
+    import base64
+    from app.core.config import config
+
+    headers = {"Authorization": f"Bearer {login}"}
+    for value in ("zz", [0.5, "x"], [0.5], [0.5, -1], [0.5, config.item_search_max_results], ["x", 1]):
+        cursor = base64.urlsafe_b64encode(json.dumps(["rank", value, 3]).encode()).decode()
+        response = await client.get("api/v1/items/search", params={"q": "blade", "cursor": cursor}, headers=headers)
+        assert response.status_code == 400, value
+
+
+@pytest.mark.anyio
+async def test_get_item_is_cached(client, login):
+    from app.api.items.crud import item_cache
+
+    headers = {"Authorization": f"Bearer {login}"}
+    test_item = {"name": f"{fake.word()}-{fake.uuid4()}",
+                 "description": fake.sentence(),
+                 "category": "Gadget",
+                 "quantity": 3,
+                 "price": fake.random_int(min=1, max=20000) / 100
+                 }
+    response_creation = await client.post("api/v1/items", json=test_item, headers=headers)
+    item_id = response_creation.json().get('id')
+
+    hits = item_cache.stats()["hits"]
+    response = await client.get(f"api/v1/items/{item_id}", headers=headers)
+    assert response.status_code == 200
+    assert item_cache.stats()["hits"] == hits + 1
+
+    await client.patch(f"api/v1/items/{item_id}", json={"quantity": 7}, headers=headers)
+    response = await client.get(f"api/v1/items/{item_id}", headers=headers)
+    assert response.json()["quantity"] == 7
+
+    await client.delete(f"api/v1/items/{item_id}", headers=headers)
+    response = await client.get(f"api/v1/items/{item_id}", headers=headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_get_item_from_replica_is_not_cached(client, login):
+    from app.api.items import crud
+    from app.core.config import config
+    from app.core.models import DatabaseHelper
+
+    headers = {"Authorization": f"Bearer {login}"}
+    test_item = {"name": f"{fake.word()}-{fake.uuid4()}",
+                 "description": fake.sentence(),
+                 "category": "Gadget",
+                 "quantity": 1,
+                 "price": 1.0
+                 }
+    item_id = (await client.post("api/v1/items", json=test_item, headers=headers)).json()["id"]
+    await crud.item_cache.delete(item_id)
+
+    helper = DatabaseHelper(url=config.SQLALCHEMY_DATABASE_URL, replica_urls=[config.SQLALCHEMY_DATABASE_URL])
+    async with helper.read_session_factory()() as session:
+        assert (await crud.get_item(session=session, item_id=item_id)).id == item_id
+    assert await crud.item_cache.get(item_id) is None
+    await helper.replica_engines[0].dispose()
+
+
+@pytest.mark.anyio
+async def test_item_etag(client, login):
+    from app.api.items.crud import item_cache
+
+    headers = {"Authorization": f"Bearer {login}"}
+    test_item = {"name": f"{fake.word()}-{fake.uuid4()}",
+                 "description": fake.sentence(),
+                 "category": "Weapon",
+                 "quantity": 1,
+                 "price": fake.random_int(min=1, max=20000) / 100
+                 }
+    response_creation = await client.post("api/v1/items", json=test_item, headers=headers)
+    item_id = response_creation.json().get('id')
+
+    response = await client.get(f"api/v1/items/{item_id}", headers=headers)
+    etag = response.headers["ETag"]
+    response = await client.get(f"api/v1/items/{item_id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = await client.patch(
+        f"api/v1/items/{item_id}", json={"quantity": 2}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    response = await client.delete(f"api/v1/items/{item_id}", headers={**headers, "If-Match": etag})
+    assert response.status_code == 412
+
+    response = await client.get(f"api/v1/items/{item_id}", headers=headers)
+    stale = await item_cache.get(item_id)
+    etag = response.headers["ETag"]
+    await client.delete(f"api/v1/items/{item_id}", headers=headers)
+    await item_cache.set(item_id, stale)
+    response = await client.delete(f"api/v1/items/{item_id}", headers={**headers, "If-Match": etag})
+    assert response.status_code == 404